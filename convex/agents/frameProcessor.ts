@@ -2,6 +2,7 @@ import { v } from "convex/values";
 import { internalAction, internalMutation, internalQuery } from "../_generated/server";
 import { internal } from "../_generated/api";
 import { Id } from "../_generated/dataModel";
+import { frameRegion } from "../schema";
 
 /**
  * Configuration for frame processing
@@ -19,6 +20,7 @@ export const submitFrame = internalAction({
     cameraId: v.id("cameraFeeds"),
     frameData: v.string(), // base64 encoded
     priority: v.optional(v.number()), // Higher = process sooner (default: 1)
+    roi: v.optional(frameRegion), // Set when frameData is only the changed region of the frame
   },
   returns: v.object({
     cached: v.boolean(),
@@ -36,8 +38,11 @@ export const submitFrame = internalAction({
     queueId?: Id<"frameQueue">;
     message: string;
   }> => {
-    // Hash the frame for deduplication
-    const frameHash = hashFrame(args.frameData);
+    // Hash the frame for deduplication. A crop is keyed by its position too, so
+    // its analysis is never served for a full frame (or a crop elsewhere)
+    const frameHash = args.roi && !args.roi.keyframe
+      ? `${hashFrame(args.frameData)}@${args.roi.x},${args.roi.y},${args.roi.width}x${args.roi.height}`
+      : hashFrame(args.frameData);
     
     // Check if we have a cached result
     const cached = await ctx.runQuery(internal.agents.frameProcessor.checkCache, {
@@ -82,6 +87,7 @@ export const submitFrame = internalAction({
       frameData: args.frameData,
       frameHash,
       priority: args.priority || 1,
+      roi: args.roi,
     });
 
     // Check if we should trigger batch processing
@@ -161,6 +167,7 @@ export const processBatch = internalAction({
         const analysis = await ctx.runAction(internal.agents.visionAgent.analyzeFrame, {
           cameraId: args.cameraId,
           frameData: frame.frameData,
+          roi: frame.roi,
         });
 
         // Get the analysis ID (it was stored by visionAgent)
@@ -316,6 +323,23 @@ export const getLatestAnalysis = internalQuery({
   },
 });
 
+/**
+ * Get the latest analysis of a full frame (not a changed-region crop)
+ */
+export const getLatestFullFrameAnalysis = internalQuery({
+  args: {
+    cameraId: v.id("cameraFeeds"),
+  },
+  handler: async (ctx, args) => {
+    return await ctx.db
+      .query("visionAnalysis")
+      .withIndex("by_camera", (q) => q.eq("cameraId", args.cameraId))
+      .order("desc")
+      .filter((q) => q.eq(q.field("region"), undefined))
+      .first();
+  },
+});
+
 /**
  * Enqueue a frame for processing
  */
@@ -325,6 +349,7 @@ export const enqueueFrame = internalMutation({
     frameData: v.string(),
     frameHash: v.string(),
     priority: v.number(),
+    roi: v.optional(frameRegion),
   },
   handler: async (ctx, args) => {
     return await ctx.db.insert("frameQueue", {
@@ -334,6 +359,7 @@ export const enqueueFrame = internalMutation({
       timestamp: Date.now(),
       status: "pending",
       priority: args.priority,
+      ...(args.roi && { roi: args.roi }),
     });
   },
 });
@@ -1,5 +1,6 @@
 import { v } from "convex/values";
 import { internalMutation } from "../_generated/server";
+import { frameRegion } from "../schema";
 
 export const logStep = internalMutation({
   args: {
@@ -43,6 +44,7 @@ export const storeAnalysis = internalMutation({
     analysis: v.string(),
     detectedIssues: v.array(v.string()),
     requiresAction: v.boolean(),
+    region: v.optional(frameRegion),
   },
   handler: async (ctx, args) => {
     await ctx.db.insert("visionAnalysis", {
@@ -52,6 +54,7 @@ export const storeAnalysis = internalMutation({
       detectedIssues: args.detectedIssues,
       confidence: 0.85,
       requiresAction: args.requiresAction,
+      ...(args.region && { region: args.region }),
     });
   },
 });
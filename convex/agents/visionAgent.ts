@@ -3,11 +3,15 @@
 import { v } from "convex/values";
 import { internalAction, internalMutation } from "../_generated/server";
 import { internal } from "../_generated/api";
+import { frameRegion } from "../schema";
+
+const FULL_FRAME_PROMPT = "Analyze this frame from the maintenance camera. Look for: 1) Safety violations 2) Equipment issues 3) Technician errors 4) Parts that need replacement";
 
 export const analyzeFrame = internalAction({
   args: {
     cameraId: v.id("cameraFeeds"),
     frameData: v.string(), // base64 encoded image
+    roi: v.optional(frameRegion), // Set when frameData is only the changed region of the frame
   },
   handler: async (ctx, args): Promise<{ analysis: string; detectedIssues: string[]; requiresAction: boolean }> => {
     // Check if API key is configured
@@ -23,6 +27,22 @@ export const analyzeFrame = internalAction({
       contextId: args.cameraId,
     });
 
+    // A crop is only meaningful next to what the last full frame showed
+    let prompt = FULL_FRAME_PROMPT;
+    const roi = args.roi && !args.roi.keyframe ? args.roi : undefined;
+    if (roi) {
+      const keyframeAnalysis = await ctx.runQuery(internal.agents.frameProcessor.getLatestFullFrameAnalysis, {
+        cameraId: args.cameraId,
+      });
+      prompt = `This image is NOT the whole scene: it is only the ${roi.width}x${roi.height} region at ` +
+        `(${roi.x}, ${roi.y}) of the ${roi.frameWidth}x${roi.frameHeight} camera frame, the part that changed ` +
+        `since the last full frame. ` +
+        (keyframeAnalysis
+          ? `The last full-frame analysis was:\n${keyframeAnalysis.analysis}\n\n`
+          : "No full-frame analysis is available yet.\n\n") +
+        "Describe what changed in this region. " + FULL_FRAME_PROMPT;
+    }
+
     // Call OpenRouter Nemotron for vision analysis
     const response: Response = await fetch("https://openrouter.ai/api/v1/chat/completions", {
       method: "POST",
@@ -43,7 +63,7 @@ export const analyzeFrame = internalAction({
             content: [
               {
                 type: "text",
-                text: "Analyze this frame from the maintenance camera. Look for: 1) Safety violations 2) Equipment issues 3) Technician errors 4) Parts that need replacement"
+                text: prompt
               },
               {
                 type: "image_url",
@@ -70,6 +90,7 @@ export const analyzeFrame = internalAction({
       analysis,
       detectedIssues,
       requiresAction,
+      region: roi,
     });
 
     // Update memory
@@ -10,7 +10,7 @@ http.route({
   method: "POST",
   handler: httpAction(async (ctx, req) => {
     const body = await req.json();
-    const { cameraId, frameData, priority } = body;
+    const { cameraId, frameData, priority, roi } = body;
 
     if (!cameraId || !frameData) {
       return new Response(JSON.stringify({ error: "Missing cameraId or frameData" }), {
@@ -25,6 +25,7 @@ http.route({
         cameraId,
         frameData,
         priority: priority || 1,
+        ...(roi && { roi }),
       });
 
       return new Response(JSON.stringify(result), {
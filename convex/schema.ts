@@ -2,6 +2,21 @@ import { defineSchema, defineTable } from "convex/server";
 import { v } from "convex/values";
 import { authTables } from "@convex-dev/auth/server";
 
+// Region of a camera frame sent by the ingest scripts' --tile-diff mode:
+// frameData is only this crop of the full frameWidth x frameHeight frame
+// unless keyframe is true
+export const frameRegion = v.object({
+  keyframe: v.boolean(),
+  x: v.number(),
+  y: v.number(),
+  width: v.number(),
+  height: v.number(),
+  frameWidth: v.number(),
+  frameHeight: v.number(),
+  changedTiles: v.number(),
+  totalTiles: v.number(),
+});
+
 const applicationTables = {
   // Tickets (formerly Work Orders)
   tickets: defineTable({
@@ -71,6 +86,7 @@ const applicationTables = {
     confidence: v.number(),
     requiresAction: v.boolean(),
     actionTaken: v.optional(v.string()),
+    region: v.optional(frameRegion), // Set when only a changed region was analyzed
   }).index("by_camera", ["cameraId"]),
 
   // Agent Memory/State
@@ -189,6 +205,7 @@ const applicationTables = {
     ),
     batchId: v.optional(v.string()), // Group frames into batches
     priority: v.number(), // Higher priority = process sooner
+    roi: v.optional(frameRegion), // Changed region when frameData is a crop
   })
     .index("by_status", ["status"])
     .index("by_camera_and_status", ["cameraId", "status"])
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Import-Time Budget Check
+
+Starts the camera website and each CLI script in a fresh interpreter with
+`python -X importtime` and fails if any of them spends more than the budget
+importing modules before it can do useful work (bind its port / print --help).
+Heavy modules (OpenCV, numpy, requests, aiortc, the Voxel SDK) are supposed
+to load on first use, so a regression here usually means one of them crept
+back into a module-level import.
+
+Requirements:
+    None (standard library only)
+
+Usage:
+    # Check everything against the default 300 ms budget
+    python check-import-time.py
+
+    # Tighter budget, show the 10 slowest imports per target
+    python check-import-time.py --budget-ms 150 --top 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+WEBSITE_DIR = os.path.join(REPO_ROOT, 'src', 'cam', 'website')
+
+# (name, working directory, interpreter arguments)
+TARGETS = [
+    ('camera website', WEBSITE_DIR, ['-c', 'import main']),
+    ('extract-frames.py --help', SCRIPTS_DIR, ['extract-frames.py', '--help']),
+    ('livestream-monitor.py --help', SCRIPTS_DIR, ['livestream-monitor.py', '--help']),
+    ('test-single-frame.py --help', SCRIPTS_DIR, ['test-single-frame.py', '--help']),
+    ('load-test.py --help', SCRIPTS_DIR, ['load-test.py', '--help']),
+    ('mock-frame-api.py --help', SCRIPTS_DIR, ['mock-frame-api.py', '--help']),
+]
+
+
+def measure(cwd, args, baseline=()):
+    """
+    Run one target with -X importtime
+
+    Args:
+        cwd: Working directory for the target
+        args: Interpreter arguments
+        baseline: Top-level modules every interpreter imports at startup (excluded)
+
+    Returns:
+        (total import seconds, [(cumulative seconds, module), ...] for top-level imports, error)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args,
+        cwd=cwd, capture_output=True, text=True,
+    )
+
+    top_level = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, package = line[len('import time:'):].split('|')
+        # Nested imports are indented under the module that triggered them
+        if package.startswith('  ') or package.strip() in baseline:
+            continue
+        top_level.append((int(cumulative) / 1e6, package.strip()))
+
+    error = None
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit {result.returncode}"
+    return sum(seconds for seconds, _ in top_level), top_level, error
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fail if the camera website or CLI scripts import too much at startup"
+    )
+    parser.add_argument('--budget-ms', type=float, default=300.0,
+                       help='Maximum import time per target in milliseconds (default: 300)')
+    parser.add_argument('--top', type=int, default=5,
+                       help='Number of slowest imports to show per target (default: 5)')
+
+    args = parser.parse_args()
+
+    print(f"⏱️  Import-time budget: {args.budget_ms:.0f} ms\n")
+
+    # Interpreter startup (site, encodings, ...) isn't something the targets can fix
+    _, startup, _ = measure(SCRIPTS_DIR, ['-c', 'pass'])
+    baseline = {package for _, package in startup}
+
+    failed = False
+    for name, cwd, target_args in TARGETS:
+        total, top_level, error = measure(cwd, target_args, baseline)
+        total_ms = total * 1000
+
+        if error:
+            status = f"⚠️  ERROR ({error})"
+            failed = True
+        elif total_ms > args.budget_ms:
+            status = "❌ OVER BUDGET"
+            failed = True
+        else:
+            status = "✅ OK"
+
+        print(f"{status}  {name}: {total_ms:.1f} ms")
+        for seconds, package in sorted(top_level, reverse=True)[:args.top]:
+            print(f"      {seconds * 1000:8.1f} ms  {package}")
+        print()
+
+    if failed:
+        print("❌ Import-time check failed")
+        sys.exit(1)
+
+    print("✅ All targets within budget")
+
+
+if __name__ == '__main__':
+    main()
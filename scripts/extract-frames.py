@@ -17,19 +17,65 @@ Usage:
     
     # With custom frame rate
     python extract-frames.py --video video.mp4 --camera-id <id> --api-url <url> --fps 1
+    
+    # Upload only changed regions between keyframes
+    python extract-frames.py --webcam --camera-id <id> --api-url <url> --tile-diff
+    
+    # Send the 20 most informative frames instead of sampling at a fixed rate
+    python extract-frames.py --video video.mp4 --camera-id <id> --api-url <url> --keyframes 20
+    
+    # Send every scene cut above a threshold (at most --keyframes, default 50)
+    python extract-frames.py --video video.mp4 --camera-id <id> --api-url <url> --scene-threshold 0.4
+    
+    # Skip frames that look like anything analyzed before (index persists between runs)
+    python extract-frames.py --video video.mp4 --camera-id <id> --api-url <url> --phash-radius 4
+    
+    # Let a local HOG people detector set priority and drop frames without people
+    python extract-frames.py --video video.mp4 --camera-id <id> --api-url <url> --prioritizer hog
+    
+    # Backfill from footage archived by livestream-monitor.py --archive-dir (requires PyAV)
+    python extract-frames.py --archive archive --camera-id <id> --api-url <url> --at 2025-06-01T14:03:10,2025-06-01T14:07:45
+    python extract-frames.py --archive archive --camera-id <id> --api-url <url> --from 2025-06-01T14:00 --to 2025-06-01T15:00 --fps 0.2
 """
 
-import cv2
 import base64
-import requests
 import argparse
 import time
 import os
-from typing import Optional
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from pathlib import Path
 
+if TYPE_CHECKING:
+    from frame_index import FrameHashIndex
+    from frame_priority import FramePrioritizer
+    from frame_tiles import TileDiffer
+
+# Keyframe budget per video when only --scene-threshold is given
+DEFAULT_MAX_KEYFRAMES = 50
+
+# OpenCV and requests dominate startup time, so they are imported on first use
+# and `--help` or a bad argument returns instantly
+cv2 = None
+requests = None
+phash = None
+
+
+def _import_dependencies() -> None:
+    """Import OpenCV, requests and the frame helpers"""
+    global cv2, requests, phash
+    if cv2 is not None:
+        return
+    import cv2
+    import requests
+    from frame_index import phash
+
+
 class FrameExtractor:
-    def __init__(self, api_url: str, camera_id: str, target_fps: float = 0.5, priority: int = 1):
+    def __init__(self, api_url: str, camera_id: str, target_fps: float = 0.5, priority: int = 1,
+                 tile_differ: Optional['TileDiffer'] = None, max_keyframes: Optional[int] = None,
+                 scene_threshold: Optional[float] = None, hash_index: Optional['FrameHashIndex'] = None,
+                 prioritizer: Optional['FramePrioritizer'] = None):
         """
         Initialize frame extractor
         
@@ -38,7 +84,16 @@ class FrameExtractor:
             camera_id: Convex camera feed ID
             target_fps: Frames per second to extract (default: 0.5 = 1 frame every 2 seconds)
             priority: Priority for frame processing (1-10, higher = more urgent)
+            tile_differ: Optional TileDiffer to upload only changed regions
+            max_keyframes: Send at most this many scene-scored frames per video instead of
+                sampling at target_fps
+            scene_threshold: Send every frame whose scene-change score (0-1) is at least this
+                value instead of sampling at target_fps (at most max_keyframes, default
+                DEFAULT_MAX_KEYFRAMES)
+            hash_index: Optional FrameHashIndex of previously analyzed frames to skip
+            prioritizer: Optional FramePrioritizer that sets priority per frame (priority becomes the minimum)
         """
+        _import_dependencies()
         self.api_url = api_url.rstrip('/') + '/api/analyze-frame'
         self.camera_id = camera_id
         self.target_fps = target_fps
@@ -46,12 +101,25 @@ class FrameExtractor:
         self.frames_sent = 0
         self.frames_cached = 0
         self.frames_skipped = 0
+        self.frames_unchanged = 0
+        self.frames_duplicate = 0
+        self.frames_low_priority = 0
+        self.bytes_sent = 0
+        self.tile_differ = tile_differ
+        self.max_keyframes = max_keyframes
+        self.scene_threshold = scene_threshold
+        self.hash_index = hash_index
+        self.prioritizer = prioritizer
         
     def extract_from_video(self, video_path: str) -> None:
         """Extract frames from a local video file"""
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video file not found: {video_path}")
         
+        if self.max_keyframes or self.scene_threshold is not None:
+            self.extract_keyframes_from_video(video_path)
+            return
+        
         print(f"📹 Opening video: {video_path}")
         cap = cv2.VideoCapture(video_path)
         
@@ -71,6 +139,7 @@ class FrameExtractor:
         
         frame_count = 0
         extracted_count = 0
+        pending = []
         
         try:
             while True:
@@ -80,10 +149,20 @@ class FrameExtractor:
                 
                 # Extract every Nth frame
                 if frame_count % frame_interval == 0:
-                    self._send_frame(frame, frame_count, total_frames)
+                    if self.prioritizer:
+                        # Collect a batch so the pre-classifier runs once per batch
+                        pending.append((frame, frame_count))
+                        if len(pending) >= self.prioritizer.batch_size:
+                            self._send_batch(pending, total_frames)
+                            pending = []
+                    else:
+                        self._send_frame(frame, frame_count, total_frames)
                     extracted_count += 1
                 
                 frame_count += 1
+            
+            if pending:
+                self._send_batch(pending, total_frames)
                 
         finally:
             cap.release()
@@ -93,6 +172,192 @@ class FrameExtractor:
             print(f"   Sent: {self.frames_sent}")
             print(f"   Cached: {self.frames_cached}")
             print(f"   Skipped: {self.frames_skipped}")
+            if self.hash_index is not None:
+                print(f"   Duplicates (not sent): {self.frames_duplicate}")
+            if self.tile_differ:
+                print(f"   Unchanged (not sent): {self.frames_unchanged}")
+            if self.prioritizer:
+                print(f"   Low priority (not sent): {self.frames_low_priority}")
+            print(f"   Uploaded: {self.bytes_sent / 1024:.1f} KB")
+    
+    def extract_keyframes_from_video(self, video_path: str, analysis_width: int = 160,
+                                     analysis_fps: float = 4.0, min_gap: float = 1.0,
+                                     seek_after: float = 2.0) -> None:
+        """
+        Extract the most informative frames from a local video file
+        
+        Does a fast low-resolution pass scoring histogram and edge changes between
+        consecutive sampled frames, selects keyframes within the budget, then decodes
+        only the selected frames at full resolution.
+        
+        Args:
+            video_path: Path to the video file
+            analysis_width: Width in pixels of the low-resolution scoring pass
+            analysis_fps: Frames per second scored in the low-resolution pass
+            min_gap: Minimum seconds between two selected keyframes
+            seek_after: Seek instead of decoding through gaps longer than this many seconds
+        """
+        print(f"📹 Opening video: {video_path}")
+        cap = cv2.VideoCapture(video_path)
+        
+        if not cap.isOpened():
+            raise ValueError("Failed to open video file")
+        
+        video_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        stride = max(1, int(round(video_fps / analysis_fps)))
+        
+        print(f"📊 Video info: {video_fps:.2f} FPS, {total_frames} frames")
+        print(f"🔎 Scoring scene changes every {stride} frames at {analysis_width}px wide")
+        
+        # Pass 1: low-resolution scoring
+        scores: List[Tuple[int, float]] = []
+        previous = None
+        frame_index = 0
+        try:
+            while True:
+                if frame_index % stride != 0:
+                    if not cap.grab():
+                        break
+                    frame_index += 1
+                    continue
+                
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                
+                signature = _scene_signature(frame, analysis_width)
+                # The first frame always scores highest so every video gets an opening keyframe
+                score = 1.0 if previous is None else _scene_change_score(previous, signature)
+                scores.append((frame_index, score))
+                previous = signature
+                frame_index += 1
+        finally:
+            cap.release()
+        
+        total_frames = frame_index
+        selected = _select_keyframes(
+            scores,
+            max_keyframes=self.max_keyframes or DEFAULT_MAX_KEYFRAMES,
+            threshold=self.scene_threshold,
+            min_gap_frames=int(min_gap * video_fps),
+        )
+        
+        print(f"🎯 Selected {len(selected)} keyframes from {len(scores)} scored frames")
+        
+        # Pass 2: full-resolution decode of the selected frames only. Short gaps are
+        # cheaper to grab through; longer ones seek, which decodes from the nearest
+        # keyframe instead of every frame in between
+        cap = cv2.VideoCapture(video_path)
+        seek_gap = max(1, int(seek_after * video_fps))
+        position = 0
+        extracted_count = 0
+        pending = []
+        batch_size = self.prioritizer.batch_size if self.prioritizer else 1
+        try:
+            for frame_index in selected:
+                if frame_index - position > seek_gap:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+                    position = frame_index
+                while position < frame_index and cap.grab():
+                    position += 1
+                if position < frame_index:
+                    break
+                
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                position += 1
+                
+                pending.append((frame, frame_index))
+                if len(pending) >= batch_size:
+                    self._send_batch(pending, max(total_frames, 1))
+                    pending = []
+                extracted_count += 1
+            
+            if pending:
+                self._send_batch(pending, max(total_frames, 1))
+        finally:
+            cap.release()
+            print(f"\n✅ Keyframe extraction complete!")
+            print(f"   Total frames: {total_frames}")
+            print(f"   Extracted: {extracted_count}")
+            print(f"   Sent: {self.frames_sent}")
+            print(f"   Cached: {self.frames_cached}")
+            print(f"   Skipped: {self.frames_skipped}")
+            if self.hash_index is not None:
+                print(f"   Duplicates (not sent): {self.frames_duplicate}")
+            if self.tile_differ:
+                print(f"   Unchanged (not sent): {self.frames_unchanged}")
+            if self.prioritizer:
+                print(f"   Low priority (not sent): {self.frames_low_priority}")
+            print(f"   Uploaded: {self.bytes_sent / 1024:.1f} KB")
+    
+    def extract_from_archive(self, archive_dir: str, timestamps: Optional[List[float]] = None,
+                             start: Optional[float] = None, end: Optional[float] = None) -> None:
+        """
+        Extract frames from an H.264 archive written by livestream-monitor.py --archive-dir
+        
+        The archive index maps timestamps to byte offsets, so only the GOPs holding
+        the requested frames are read and decoded.
+        
+        Args:
+            archive_dir: Per-camera archive directory
+            timestamps: Capture times (epoch seconds) to send; the closest archived frame is used
+            start: Otherwise sample at target_fps from this time (default: start of the archive)
+            end: ... up to this time (default: end of the archive)
+        """
+        from frame_archive import ArchiveReader
+        
+        print(f"🗄️  Opening archive: {archive_dir}")
+        reader = ArchiveReader(archive_dir)
+        span = reader.span()
+        if span is None:
+            raise ValueError(f"Archive is empty: {archive_dir}")
+        
+        print(f"📊 Archive info: {len(reader.segments)} segments, {span[1] - span[0]:.0f}s of footage")
+        
+        if timestamps is None:
+            start = span[0] if start is None else max(start, span[0])
+            end = span[1] if end is None else min(end, span[1])
+            step = 1.0 / self.target_fps
+            count = int((end - start) / step) + 1 if end >= start else 0
+            timestamps = [start + i * step for i in range(count)]
+            print(f"🎯 Extracting at {self.target_fps} FPS")
+        
+        total = max(len(timestamps), 1)
+        extracted_count = 0
+        last_timestamp = None
+        pending = []
+        batch_size = self.prioritizer.batch_size if self.prioritizer else 1
+        try:
+            for i, (_, frame_timestamp, frame) in enumerate(reader.frames_at(timestamps)):
+                # Requests falling in a gap of the archive resolve to the same frame; send it once
+                if frame_timestamp == last_timestamp:
+                    continue
+                last_timestamp = frame_timestamp
+                pending.append((frame, i))
+                if len(pending) >= batch_size:
+                    self._send_batch(pending, total)
+                    pending = []
+                extracted_count += 1
+            
+            if pending:
+                self._send_batch(pending, total)
+        finally:
+            print(f"\n✅ Archive extraction complete!")
+            print(f"   Requested: {len(timestamps)}")
+            print(f"   Extracted: {extracted_count}")
+            print(f"   Sent: {self.frames_sent}")
+            print(f"   Cached: {self.frames_cached}")
+            print(f"   Skipped: {self.frames_skipped}")
+            if self.hash_index is not None:
+                print(f"   Duplicates (not sent): {self.frames_duplicate}")
+            if self.tile_differ:
+                print(f"   Unchanged (not sent): {self.frames_unchanged}")
+            if self.prioritizer:
+                print(f"   Low priority (not sent): {self.frames_low_priority}")
+            print(f"   Uploaded: {self.bytes_sent / 1024:.1f} KB")
     
     def extract_from_youtube(self, youtube_url: str, max_duration: int = 300) -> None:
         """
@@ -156,10 +421,58 @@ class FrameExtractor:
                 print(f"   python {__file__} --video path/to/video.mp4 --camera-id ... --api-url ...")
             raise
     
-    def _send_frame(self, frame, frame_number: int, total_frames: int) -> None:
+    def _send_batch(self, batch, total_frames: int) -> None:
+        """Prioritize a batch of (frame, frame_number) pairs in one model call, then send each"""
+        if self.prioritizer:
+            priorities = self.prioritizer.prioritize([frame for frame, _ in batch], self.priority)
+        else:
+            priorities = [self.priority] * len(batch)
+        
+        for (frame, frame_number), priority in zip(batch, priorities):
+            if priority is None:
+                self._drop_low_priority(frame_number, total_frames)
+            else:
+                self._send_frame(frame, frame_number, total_frames, priority)
+    
+    def _drop_low_priority(self, frame_number: int, total_frames: int) -> None:
+        self.frames_low_priority += 1
+        progress = (frame_number / total_frames) * 100
+        print(f"[{progress:5.1f}%] Frame {frame_number:6d}: 💤 LOW PRIORITY (not sent)")
+    
+    def _send_frame(self, frame, frame_number: int, total_frames: int, priority: Optional[int] = None) -> None:
         """Send a single frame to the API"""
+        if priority is None:
+            priority = self.priority
+            if self.prioritizer:
+                priority = self.prioritizer.prioritize([frame], self.priority)[0]
+                if priority is None:
+                    self._drop_low_priority(frame_number, total_frames)
+                    return
+        
+        progress = (frame_number / total_frames) * 100
+        frame_hash = None
+        if self.hash_index is not None:
+            frame_hash = phash(frame)
+            match = self.hash_index.lookup(frame_hash)
+            if match:
+                self.frames_duplicate += 1
+                ref = f" of {match[1]}" if match[1] else ""
+                print(f"[{progress:5.1f}%] Frame {frame_number:6d}: 🔁 DUPLICATE{ref} (distance {match[2]}, not sent)")
+                return
+        
+        roi = None
+        if self.tile_differ:
+            update = self.tile_differ.process(frame)
+            if update is None:
+                self.frames_unchanged += 1
+                print(f"[{progress:5.1f}%] Frame {frame_number:6d}: 🟰 UNCHANGED (not sent)")
+                return
+            frame = update.image
+            roi = update.to_payload()
+        
         # Encode frame to JPEG
         _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        self.bytes_sent += len(buffer)
         
         # Convert to base64
         frame_b64 = base64.b64encode(buffer).decode('utf-8')
@@ -168,8 +481,10 @@ class FrameExtractor:
         payload = {
             'cameraId': self.camera_id,
             'frameData': frame_b64,
-            'priority': self.priority
+            'priority': priority
         }
+        if roi:
+            payload['roi'] = roi
         
         try:
             response = requests.post(self.api_url, json=payload, timeout=30)
@@ -177,6 +492,9 @@ class FrameExtractor:
             result = response.json()
             
             # Track results
+            if frame_hash is not None and (result.get('cached') or result.get('queued')):
+                self.hash_index.add(frame_hash, result.get('analysisId') or result.get('queueId') or '')
+            
             if result.get('cached'):
                 self.frames_cached += 1
                 status = "💾 CACHED"
@@ -189,7 +507,11 @@ class FrameExtractor:
             else:
                 status = "❓ UNKNOWN"
             
-            progress = (frame_number / total_frames) * 100
+            if self.prioritizer:
+                status += f" [P{priority}]"
+            if roi and not roi['keyframe']:
+                status += f" (ROI {roi['width']}x{roi['height']}, {roi['changedTiles']}/{roi['totalTiles']} tiles)"
+            
             print(f"[{progress:5.1f}%] Frame {frame_number:6d}: {status}")
             
         except requests.exceptions.RequestException as e:
@@ -210,6 +532,8 @@ class FrameExtractor:
         
         start_time = time.time()
         frame_count = 0
+        total_frames = duration * self.target_fps
+        pending = []
         
         try:
             while (time.time() - start_time) < duration:
@@ -217,18 +541,100 @@ class FrameExtractor:
                 if not ret:
                     break
                 
-                self._send_frame(frame, frame_count, duration * self.target_fps)
+                if self.prioritizer:
+                    # Collect a batch so the pre-classifier runs once per batch
+                    pending.append((frame, frame_count))
+                    if len(pending) >= self.prioritizer.batch_size:
+                        self._send_batch(pending, total_frames)
+                        pending = []
+                else:
+                    self._send_frame(frame, frame_count, total_frames)
                 frame_count += 1
                 
                 # Wait for next frame based on target FPS
                 time.sleep(1.0 / self.target_fps)
                 
+            if pending:
+                self._send_batch(pending, total_frames)
+                
         finally:
             cap.release()
             print(f"\n✅ Webcam capture complete!")
             print(f"   Frames captured: {frame_count}")
             print(f"   Sent: {self.frames_sent}")
             print(f"   Cached: {self.frames_cached}")
+            if self.tile_differ:
+                print(f"   Unchanged (not sent): {self.frames_unchanged}")
+            if self.hash_index is not None:
+                print(f"   Duplicates (not sent): {self.frames_duplicate}")
+            if self.prioritizer:
+                print(f"   Low priority (not sent): {self.frames_low_priority}")
+
+
+def _scene_signature(frame, width: int):
+    """Downscaled hue/saturation histogram and edge map used for scene scoring"""
+    height = max(1, int(frame.shape[0] * width / frame.shape[1]))
+    small = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1], None, [16, 16], [0, 180, 0, 256])
+    cv2.normalize(hist, hist)
+    
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    edges = cv2.Canny(gray, 100, 200) > 0
+    return hist, edges
+
+
+def _scene_change_score(previous, current) -> float:
+    """Scene-change score in [0, 1] between two signatures"""
+    prev_hist, prev_edges = previous
+    hist, edges = current
+    
+    hist_distance = cv2.compareHist(prev_hist, hist, cv2.HISTCMP_BHATTACHARYYA)
+    
+    edge_pixels = max(int(prev_edges.sum()), int(edges.sum()), 1)
+    edge_change = min(1.0, int((prev_edges ^ edges).sum()) / edge_pixels)
+    
+    return 0.5 * float(hist_distance) + 0.5 * edge_change
+
+
+def _select_keyframes(scores: List[Tuple[int, float]], max_keyframes: Optional[int] = None,
+                      threshold: Optional[float] = None, min_gap_frames: int = 0) -> List[int]:
+    """
+    Pick keyframe indices from (frame_index, score) pairs
+    
+    Highest scores win; frames closer than min_gap_frames to an already selected
+    frame are dropped. Returns frame indices in playback order.
+    """
+    candidates = scores
+    if threshold is not None:
+        candidates = [item for item in scores if item[1] >= threshold]
+    
+    selected: List[int] = []
+    for frame_index, _ in sorted(candidates, key=lambda item: item[1], reverse=True):
+        if max_keyframes and len(selected) >= max_keyframes:
+            break
+        if any(abs(frame_index - other) < min_gap_frames for other in selected):
+            continue
+        selected.append(frame_index)
+    
+    return sorted(selected)
+
+
+def _parse_timestamp(value: str) -> float:
+    """Epoch seconds or an ISO 8601 date/time (local time unless it has an offset)"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid timestamp: {value}")
+
+
+def _parse_timestamps(value: str) -> List[float]:
+    return [_parse_timestamp(part.strip()) for part in value.split(',') if part.strip()]
 
 
 def main():
@@ -241,6 +647,7 @@ def main():
     source_group.add_argument('--video', help='Path to video file')
     source_group.add_argument('--youtube', help='YouTube video URL')
     source_group.add_argument('--webcam', action='store_true', help='Use webcam')
+    source_group.add_argument('--archive', help='Archive directory written by livestream-monitor.py --archive-dir')
     
     # Required parameters
     parser.add_argument('--camera-id', required=True, help='Convex camera feed ID')
@@ -253,15 +660,83 @@ def main():
                        help='Frame priority 1-10 (default: 1)')
     parser.add_argument('--duration', type=int, default=60,
                        help='Duration in seconds for webcam capture (default: 60)')
+    parser.add_argument('--tile-diff', action='store_true',
+                       help='Upload only tiles that changed since the last keyframe')
+    parser.add_argument('--tile-grid', type=int, default=8,
+                       help='Tiles per side for --tile-diff (default: 8)')
+    parser.add_argument('--tile-threshold', type=float, default=12.0,
+                       help='Mean pixel difference for a tile to count as changed (default: 12)')
+    parser.add_argument('--keyframe-interval', type=int, default=30,
+                       help='Full keyframe after this many ROI uploads (default: 30)')
+    parser.add_argument('--phash-radius', type=int,
+                       help='Skip frames within this Hamming distance (0-63) of any previously analyzed frame')
+    parser.add_argument('--phash-index-dir', default='.frame_index',
+                       help='Directory for the per-camera perceptual hash index (default: .frame_index)')
+    parser.add_argument('--prioritizer', choices=['motion', 'hog', 'dnn'],
+                       help='Score frames locally and set priority dynamically (--priority becomes the minimum)')
+    parser.add_argument('--priority-floor', type=float, default=0.1,
+                       help='Drop frames scoring below this (0-1) with --prioritizer (default: 0.1)')
+    parser.add_argument('--priority-batch', type=int, default=8,
+                       help='Frames per pre-classifier batch (default: 8)')
+    parser.add_argument('--dnn-model', help='Detector weights for --prioritizer dnn')
+    parser.add_argument('--dnn-config', help='Detector config for --prioritizer dnn (e.g. .prototxt)')
+    parser.add_argument('--dnn-person-class', type=int, default=15,
+                       help='Person class ID in the detector label map (default: 15, VOC MobileNet-SSD)')
+    parser.add_argument('--keyframes', type=int,
+                       help='Send the N most informative frames per video instead of sampling at --fps')
+    parser.add_argument('--scene-threshold', type=float,
+                       help='Send every scene change scoring at least this (0-1) instead of sampling at --fps '
+                            f'(at most --keyframes, default {DEFAULT_MAX_KEYFRAMES})')
+    parser.add_argument('--at', type=_parse_timestamps,
+                       help='Comma-separated capture times to send from --archive (epoch seconds or ISO 8601)')
+    parser.add_argument('--from', dest='start', type=_parse_timestamp,
+                       help='Sample --archive at --fps from this time (default: start of the archive)')
+    parser.add_argument('--to', dest='end', type=_parse_timestamp,
+                       help='Sample --archive at --fps up to this time (default: end of the archive)')
     
     args = parser.parse_args()
+
+    if (args.webcam or args.archive) and (args.keyframes is not None or args.scene_threshold is not None):
+        parser.error("--keyframes and --scene-threshold only apply to --video and --youtube")
+    
+    tile_differ = None
+    if args.tile_diff:
+        from frame_tiles import TileDiffer
+        tile_differ = TileDiffer(
+            grid=args.tile_grid,
+            threshold=args.tile_threshold,
+            keyframe_interval=args.keyframe_interval
+        )
+
+    hash_index = None
+    if args.phash_radius is not None:
+        from frame_index import PersistentFrameHashIndex
+        hash_index = PersistentFrameHashIndex(args.phash_index_dir, args.camera_id, args.phash_radius)
+        print(f"🗂️  Loaded {len(hash_index)} indexed frames from {hash_index.path}")
+
+    prioritizer = None
+    if args.prioritizer:
+        from frame_priority import FramePrioritizer
+        prioritizer = FramePrioritizer(
+            backend=args.prioritizer,
+            floor=args.priority_floor,
+            batch_size=args.priority_batch,
+            model_path=args.dnn_model,
+            config_path=args.dnn_config,
+            person_class=args.dnn_person_class
+        )
     
     # Initialize extractor
     extractor = FrameExtractor(
         api_url=args.api_url,
         camera_id=args.camera_id,
         target_fps=args.fps,
-        priority=args.priority
+        priority=args.priority,
+        tile_differ=tile_differ,
+        max_keyframes=args.keyframes,
+        scene_threshold=args.scene_threshold,
+        hash_index=hash_index,
+        prioritizer=prioritizer
     )
     
     # Extract from appropriate source
@@ -271,6 +746,17 @@ def main():
         extractor.extract_from_youtube(args.youtube)
     elif args.webcam:
         extractor.extract_from_webcam(args.duration)
+    elif args.archive:
+        from frame_archive import archive_dir_for
+        extractor.extract_from_archive(
+            archive_dir_for(args.archive, args.camera_id),
+            timestamps=args.at,
+            start=args.start,
+            end=args.end
+        )
+    
+    if hash_index is not None:
+        hash_index.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,360 @@
+"""
+H.264 segment archive of captured frames with a frame-accurate index
+
+SegmentArchiver encodes frames on a background CPU thread into rolling raw
+H.264 (Annex B) segment files. Every encoded packet is written by us, so
+the sidecar index records its exact byte offset together with the capture
+timestamp and a keyframe flag. Inter-frame compression stores a static
+data-center floor at roughly a tenth of the size of the equivalent MJPEG.
+
+ArchiveReader uses the index to decode exactly the requested timestamps: it
+finds the nearest frame, reads only the bytes from the preceding keyframe up
+to that frame, and decodes just those packets, so backfill analysis never
+scans whole recordings.
+
+The encoder runs with B-frames disabled (tune=zerolatency) so packet order
+equals capture order and one packet maps to exactly one frame, and with
+in-band SPS/PPS on every keyframe so decoding can start at any keyframe.
+
+Requirements:
+    pip install av numpy
+"""
+
+import os
+import queue
+import struct
+import threading
+import time
+from array import array
+from fractions import Fraction
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import av
+import numpy as np
+
+# Index record: capture timestamp, byte offset in the .h264 file, packet size, flags (bit 0 = keyframe)
+INDEX_RECORD = struct.Struct("<dQIB")
+SEGMENT_EXT = '.h264'
+INDEX_EXT = '.idx'
+
+
+class SegmentArchiver:
+    def __init__(self, archive_dir: str, fps: float = 10.0, segment_seconds: float = 300.0,
+                 gop: int = 50, crf: int = 28, preset: str = 'veryfast', codec: str = 'libx264',
+                 retention_hours: Optional[float] = None, queue_size: int = 120):
+        """
+        Initialize archiver and start its encoder thread
+
+        Args:
+            archive_dir: Directory for this camera's segments
+            fps: Nominal frame rate given to the encoder for rate control
+            segment_seconds: Start a new segment file after this many seconds
+            gop: Frames between keyframes (bounds how much is decoded per seek)
+            crf: x264 constant rate factor (higher = smaller files)
+            preset: x264 speed/size preset
+            codec: Software H.264 encoder name
+            retention_hours: Delete segments older than this (None keeps everything)
+            queue_size: Frames buffered for the encoder before new frames are dropped
+        """
+        os.makedirs(archive_dir, exist_ok=True)
+        self.archive_dir = archive_dir
+        self.fps = fps
+        self.segment_seconds = segment_seconds
+        self.gop = gop
+        self.crf = crf
+        self.preset = preset
+        self.codec = codec
+        self.retention_hours = retention_hours
+
+        self.frames_archived = 0
+        self.frames_dropped = 0
+        self.bytes_written = 0
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._encoder = None
+        self._segment_start = 0.0
+        self._data_file = None
+        self._index_file = None
+        self._offset = 0
+        self._size = None
+        self._thread = threading.Thread(target=self._run, name="h264-archiver", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, timestamp: Optional[float] = None) -> bool:
+        """
+        Queue a BGR frame for encoding without blocking the capture loop
+
+        Returns:
+            False if the encoder is behind and the frame was dropped
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        try:
+            self._queue.put_nowait((frame, timestamp))
+            return True
+        except queue.Full:
+            self.frames_dropped += 1
+            return False
+
+    def close(self) -> None:
+        """Encode everything still queued and close the current segment"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, timestamp = item
+            try:
+                self._encode(frame, timestamp)
+            except Exception as e:
+                print(f"❌ Archive encoder error: {e}")
+                self._close_segment()
+        self._close_segment()
+
+    def _encode(self, frame, timestamp: float) -> None:
+        # yuv420p needs even dimensions
+        height, width = frame.shape[0] & ~1, frame.shape[1] & ~1
+        frame = frame[:height, :width]
+
+        if (self._encoder is None
+                or (width, height) != self._size
+                or timestamp - self._segment_start >= self.segment_seconds):
+            self._close_segment()
+            self._open_segment(timestamp, width, height)
+
+        video_frame = av.VideoFrame.from_ndarray(np.ascontiguousarray(frame), format='bgr24')
+        video_frame = video_frame.reformat(format='yuv420p')
+        video_frame.pts = int(round((timestamp - self._segment_start) * 1000))
+        self._write_packets(self._encoder.encode(video_frame))
+        self.frames_archived += 1
+
+    def _open_segment(self, timestamp: float, width: int, height: int) -> None:
+        encoder = av.CodecContext.create(self.codec, 'w')
+        encoder.width = width
+        encoder.height = height
+        encoder.pix_fmt = 'yuv420p'
+        encoder.time_base = Fraction(1, 1000)
+        encoder.framerate = Fraction(self.fps).limit_denominator(1000)
+        encoder.options = {
+            'preset': self.preset,
+            'tune': 'zerolatency',
+            'crf': str(self.crf),
+            'x264-params': f"keyint={self.gop}:min-keyint={self.gop}:scenecut=0:repeat-headers=1",
+        }
+        encoder.open()
+
+        name = f"{timestamp:.3f}"
+        self._data_file = open(os.path.join(self.archive_dir, name + SEGMENT_EXT), 'wb')
+        self._index_file = open(os.path.join(self.archive_dir, name + INDEX_EXT), 'wb')
+        self._encoder = encoder
+        self._segment_start = timestamp
+        self._size = (width, height)
+        self._offset = 0
+        self._apply_retention()
+
+    def _write_packets(self, packets) -> None:
+        for packet in packets:
+            data = bytes(packet)
+            if not data or packet.pts is None:
+                continue
+            # The packet may belong to an earlier frame than the one just submitted,
+            # so its capture time comes from its own pts
+            timestamp = self._segment_start + float(packet.pts * self._encoder.time_base)
+            self._data_file.write(data)
+            self._index_file.write(INDEX_RECORD.pack(timestamp, self._offset, len(data), 1 if packet.is_keyframe else 0))
+            self._offset += len(data)
+            self.bytes_written += len(data)
+            if packet.is_keyframe:
+                # Keep what a reader can see on disk consistent at every keyframe
+                self._data_file.flush()
+                self._index_file.flush()
+
+    def _close_segment(self) -> None:
+        if self._encoder is None:
+            return
+        try:
+            # zerolatency emits one packet per frame, so this only drains stragglers
+            self._write_packets(self._encoder.encode(None))
+        except Exception:
+            pass
+        self._data_file.close()
+        self._index_file.close()
+        self._encoder = None
+        self._data_file = None
+        self._index_file = None
+
+    def _apply_retention(self) -> None:
+        if not self.retention_hours:
+            return
+        cutoff = time.time() - self.retention_hours * 3600
+        for start, stem in list_segments(self.archive_dir):
+            if start >= cutoff:
+                break
+            for ext in (SEGMENT_EXT, INDEX_EXT):
+                try:
+                    os.remove(os.path.join(self.archive_dir, stem + ext))
+                except FileNotFoundError:
+                    pass
+
+
+def archive_dir_for(root: str, camera_id: str) -> str:
+    """Per-camera archive directory under root"""
+    safe_id = ''.join(c if c.isalnum() or c in '-_' else '_' for c in camera_id)
+    return os.path.join(root, safe_id)
+
+
+def list_segments(archive_dir: str) -> List[Tuple[float, str]]:
+    """(start timestamp, file stem) of every segment, oldest first"""
+    segments = []
+    for name in os.listdir(archive_dir):
+        if name.endswith(INDEX_EXT):
+            stem = name[:-len(INDEX_EXT)]
+            try:
+                segments.append((float(stem), stem))
+            except ValueError:
+                continue
+    segments.sort()
+    return segments
+
+
+class _SegmentIndex:
+    def __init__(self, archive_dir: str, stem: str):
+        self.data_path = os.path.join(archive_dir, stem + SEGMENT_EXT)
+        self.timestamps = array('d')
+        self.offsets = array('Q')
+        self.sizes = array('I')
+        self.keyframes = array('I')  # positions of keyframe packets
+
+        with open(os.path.join(archive_dir, stem + INDEX_EXT), 'rb') as f:
+            raw = f.read()
+        # Ignore a trailing partial record from a segment that is still being written
+        usable = len(raw) - len(raw) % INDEX_RECORD.size
+        for i, (timestamp, offset, size, flags) in enumerate(INDEX_RECORD.iter_unpack(raw[:usable])):
+            self.timestamps.append(timestamp)
+            self.offsets.append(offset)
+            self.sizes.append(size)
+            if flags & 1:
+                self.keyframes.append(i)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def nearest(self, timestamp: float) -> int:
+        i = bisect_left(self.timestamps, timestamp)
+        if i == len(self.timestamps):
+            return i - 1
+        if i > 0 and timestamp - self.timestamps[i - 1] <= self.timestamps[i] - timestamp:
+            return i - 1
+        return i
+
+    def keyframe_before(self, position: int) -> Optional[int]:
+        k = bisect_right(self.keyframes, position)
+        return self.keyframes[k - 1] if k else None
+
+
+class ArchiveReader:
+    def __init__(self, archive_dir: str):
+        """
+        Open an archive directory written by SegmentArchiver
+
+        Args:
+            archive_dir: Directory holding one camera's segments
+        """
+        if not os.path.isdir(archive_dir):
+            raise FileNotFoundError(f"Archive not found: {archive_dir}")
+        self.archive_dir = archive_dir
+        self.segments = list_segments(archive_dir)
+        self._starts = [start for start, _ in self.segments]
+        self._indexes: Dict[str, _SegmentIndex] = {}
+
+    def span(self) -> Optional[Tuple[float, float]]:
+        """First and last archived timestamps"""
+        if not self.segments:
+            return None
+        first = self._index(self.segments[0][1])
+        last = self._index(self.segments[-1][1])
+        if not len(first) or not len(last):
+            return None
+        return first.timestamps[0], last.timestamps[-1]
+
+    def _index(self, stem: str) -> _SegmentIndex:
+        index = self._indexes.get(stem)
+        if index is None:
+            index = _SegmentIndex(self.archive_dir, stem)
+            self._indexes[stem] = index
+        return index
+
+    def _locate(self, timestamp: float) -> Optional[Tuple[str, int]]:
+        """Segment and packet position of the frame closest to timestamp"""
+        if not self.segments:
+            return None
+        s = max(0, bisect_right(self._starts, timestamp) - 1)
+        best = None
+        # The closest frame may be the last one of the previous segment or the first of the next
+        for stem in (self.segments[j][1] for j in (s - 1, s, s + 1) if 0 <= j < len(self.segments)):
+            index = self._index(stem)
+            if not len(index):
+                continue
+            i = index.nearest(timestamp)
+            distance = abs(index.timestamps[i] - timestamp)
+            if best is None or distance < best[0]:
+                best = (distance, stem, i)
+        return (best[1], best[2]) if best else None
+
+    def frames_at(self, timestamps: Iterable[float]) -> Iterator[Tuple[float, float, "np.ndarray"]]:
+        """
+        Decode the archived frame closest to each requested timestamp
+
+        Consecutive requests that fall in the same GOP keep decoding forward
+        instead of seeking back to the keyframe.
+
+        Yields:
+            (requested timestamp, archived frame timestamp, BGR frame)
+        """
+        decoder = None
+        decoder_stem = None
+        decoded_upto = -1
+        last_frame = None
+
+        for requested in sorted(timestamps):
+            located = self._locate(requested)
+            if located is None:
+                return
+            stem, position = located
+            index = self._index(stem)
+
+            if decoder_stem == stem and decoded_upto == position and last_frame is not None:
+                yield requested, index.timestamps[position], last_frame
+                continue
+
+            keyframe = index.keyframe_before(position)
+            if keyframe is None:
+                continue
+
+            if decoder_stem != stem or decoded_upto < keyframe or decoded_upto > position:
+                decoder = av.CodecContext.create('h264', 'r')
+                decoder.thread_type = 'SLICE'
+                decoder_stem = stem
+                start = keyframe
+            else:
+                start = decoded_upto + 1
+
+            # One contiguous read covering every packet we need to decode
+            begin = index.offsets[start]
+            end = index.offsets[position] + index.sizes[position]
+            with open(index.data_path, 'rb') as f:
+                f.seek(begin)
+                data = f.read(end - begin)
+
+            for i in range(start, position + 1):
+                chunk = data[index.offsets[i] - begin:index.offsets[i] - begin + index.sizes[i]]
+                for frame in decoder.decode(av.Packet(chunk)):
+                    last_frame = frame.to_ndarray(format='bgr24')
+            decoded_upto = position
+
+            if last_frame is not None:
+                yield requested, index.timestamps[position], last_frame
@@ -0,0 +1,129 @@
+"""
+Persistent near-duplicate index of analyzed frames
+
+Keeps a per-camera index of 64-bit perceptual hashes (DCT pHash) so the
+ingest scripts can skip any frame within a Hamming radius of a frame that was
+already analyzed, even if it recurs long after the server's last-10-frames
+dedup window (e.g. a camera panning back to the same rack).
+
+Lookups use a multi-index hash table: the 64-bit hash is split into
+radius + 1 chunks, and by the pigeonhole principle any hash within the radius
+matches at least one chunk exactly. Only the handful of entries sharing a
+chunk are compared bit-by-bit, so lookups stay well under a millisecond with
+hundreds of thousands of entries.
+
+Requirements:
+    pip install opencv-python numpy
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def phash(frame) -> int:
+    """64-bit DCT perceptual hash of a BGR or grayscale frame"""
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    # Compare against the median of the AC coefficients so the DC term doesn't skew it
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class FrameHashIndex:
+    def __init__(self, radius: int = 4):
+        """
+        Initialize an empty index
+
+        Args:
+            radius: Maximum Hamming distance (bits out of 64) that counts as a duplicate
+        """
+        if not 0 <= radius < 64:
+            raise ValueError("radius must be between 0 and 63")
+        self.radius = radius
+        self.hashes: List[int] = []
+        self.refs: List[str] = []
+
+        # Split 64 bits into radius + 1 chunks of (nearly) equal width
+        chunk_count = radius + 1
+        widths = [64 // chunk_count + (1 if i < 64 % chunk_count else 0) for i in range(chunk_count)]
+        self._chunks: List[Tuple[int, int]] = []
+        shift = 0
+        for width in widths:
+            self._chunks.append((shift, (1 << width) - 1))
+            shift += width
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in self._chunks]
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def add(self, frame_hash: int, ref: str = '') -> None:
+        """Add a hash with an optional reference to the earlier result (queue/analysis ID)"""
+        position = len(self.hashes)
+        self.hashes.append(frame_hash)
+        self.refs.append(ref)
+        for (shift, mask), table in zip(self._chunks, self._tables):
+            table.setdefault((frame_hash >> shift) & mask, []).append(position)
+
+    def lookup(self, frame_hash: int) -> Optional[Tuple[int, str, int]]:
+        """
+        Find the closest indexed hash within the radius
+
+        Returns:
+            (hash, ref, distance) of the closest match, or None
+        """
+        best = None
+        seen = set()
+        for (shift, mask), table in zip(self._chunks, self._tables):
+            for position in table.get((frame_hash >> shift) & mask, ()):
+                if position in seen:
+                    continue
+                seen.add(position)
+                distance = hamming(frame_hash, self.hashes[position])
+                if distance <= self.radius and (best is None or distance < best[2]):
+                    best = (self.hashes[position], self.refs[position], distance)
+                    if distance == 0:
+                        return best
+        return best
+
+
+class PersistentFrameHashIndex(FrameHashIndex):
+    def __init__(self, index_dir: str, camera_id: str, radius: int = 4):
+        """
+        Load (or create) the on-disk index for one camera
+
+        The file is append-only: one "<hash hex>\\t<ref>" line per analyzed frame.
+
+        Args:
+            index_dir: Directory holding one index file per camera
+            camera_id: Convex camera feed ID
+            radius: Maximum Hamming distance that counts as a duplicate
+        """
+        super().__init__(radius)
+        os.makedirs(index_dir, exist_ok=True)
+        safe_id = ''.join(c if c.isalnum() or c in '-_' else '_' for c in camera_id)
+        self.path = os.path.join(index_dir, f"{safe_id}.phash")
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    hash_hex, _, ref = line.rstrip('\n').partition('\t')
+                    if hash_hex:
+                        super().add(int(hash_hex, 16), ref)
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def add(self, frame_hash: int, ref: str = '') -> None:
+        super().add(frame_hash, ref)
+        self._file.write(f"{frame_hash:016x}\t{ref}\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
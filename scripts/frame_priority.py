@@ -0,0 +1,127 @@
+"""
+Local CPU pre-classifier that assigns frame priority before upload
+
+Scores each frame with a small CPU-only model so the server's priority queue
+spends the paid vision model on frames that matter. A frame with a person at
+an open rack gets a high priority; an empty aisle is dropped before it is
+ever uploaded.
+
+Backends:
+    motion  Background subtraction (MOG2); scores the fraction of moving pixels
+    hog     OpenCV's built-in HOG people detector
+    dnn     Any OpenCV DNN detector with the standard [1, 1, N, 7] detection
+            output (e.g. MobileNet-SSD in Caffe/TensorFlow/ONNX format)
+
+Requirements:
+    pip install opencv-python numpy
+"""
+
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+
+class FramePrioritizer:
+    def __init__(self, backend: str = 'motion', floor: float = 0.0, batch_size: int = 8,
+                 model_path: Optional[str] = None, config_path: Optional[str] = None,
+                 person_class: int = 15, input_size: int = 300):
+        """
+        Initialize pre-classifier
+
+        Args:
+            backend: 'motion', 'hog' or 'dnn'
+            floor: Frames scoring below this (0-1) are dropped instead of uploaded
+            batch_size: Frames per model call when batching
+            model_path: DNN weights (required for the dnn backend)
+            config_path: Optional DNN config (e.g. Caffe .prototxt)
+            person_class: Class ID of "person" in the DNN model's label map (15 for VOC MobileNet-SSD)
+            input_size: Square DNN input size in pixels
+        """
+        self.backend = backend
+        self.floor = floor
+        self.batch_size = batch_size
+        self.person_class = person_class
+        self.input_size = input_size
+
+        if backend == 'motion':
+            self._subtractor = cv2.createBackgroundSubtractorMOG2(history=200, detectShadows=False)
+        elif backend == 'hog':
+            if not hasattr(cv2, 'HOGDescriptor'):
+                raise RuntimeError("This OpenCV build has no HOGDescriptor. Install opencv-python 4.x or use --prioritizer motion")
+            self._hog = cv2.HOGDescriptor()
+            self._hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+        elif backend == 'dnn':
+            if not model_path:
+                raise ValueError("The dnn backend requires a model path")
+            self._net = cv2.dnn.readNet(model_path, config_path or '')
+            self._net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            self._net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        else:
+            raise ValueError(f"Unknown prioritizer backend: {backend}")
+
+    def score_batch(self, frames: List) -> List[float]:
+        """Score frames in [0, 1]; higher means more worth analyzing"""
+        if not frames:
+            return []
+        if self.backend == 'motion':
+            return [self._motion_score(frame) for frame in frames]
+        if self.backend == 'hog':
+            return [self._hog_score(frame) for frame in frames]
+
+        scores: List[float] = []
+        for start in range(0, len(frames), self.batch_size):
+            scores.extend(self._dnn_scores(frames[start:start + self.batch_size]))
+        return scores
+
+    def priority_for(self, score: float, base_priority: int = 1) -> Optional[int]:
+        """
+        Map a score to an API priority
+
+        Returns:
+            Priority 1-10 (never below base_priority), or None if the frame should be dropped
+        """
+        if score < self.floor:
+            return None
+        return max(base_priority, min(10, 1 + int(round(score * 9))))
+
+    def prioritize(self, frames: List, base_priority: int = 1) -> List[Optional[int]]:
+        """Score a batch and map each frame to a priority (None = drop)"""
+        return [self.priority_for(score, base_priority) for score in self.score_batch(frames)]
+
+    def _motion_score(self, frame) -> float:
+        small = _downscale(frame, 320)
+        mask = self._subtractor.apply(small)
+        moving = np.count_nonzero(mask) / float(mask.size)
+        # 5% of the picture moving is already a lot for a fixed camera
+        return min(1.0, moving / 0.05)
+
+    def _hog_score(self, frame) -> float:
+        small = _downscale(frame, 640)
+        _, weights = self._hog.detectMultiScale(small, winStride=(8, 8), padding=(8, 8), scale=1.05)
+        if len(weights) == 0:
+            return 0.0
+        return min(1.0, float(np.max(weights)))
+
+    def _dnn_scores(self, frames: List) -> List[float]:
+        blob = cv2.dnn.blobFromImages(
+            frames, scalefactor=1.0 / 127.5, size=(self.input_size, self.input_size),
+            mean=(127.5, 127.5, 127.5), swapRB=False, crop=False)
+        self._net.setInput(blob)
+        detections = self._net.forward().reshape(-1, 7)
+
+        # Each row: image id within the batch, class id, confidence, box
+        scores = np.zeros(len(frames), dtype=np.float32)
+        people = detections[detections[:, 1] == self.person_class]
+        for image_id, confidence in zip(people[:, 0].astype(int), people[:, 2]):
+            if 0 <= image_id < len(frames):
+                scores[image_id] = max(scores[image_id], confidence)
+        return [float(score) for score in scores]
+
+
+def _downscale(frame, width: int):
+    if frame.shape[1] <= width:
+        return frame
+    height = int(frame.shape[0] * width / frame.shape[1])
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
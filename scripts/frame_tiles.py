@@ -0,0 +1,156 @@
+"""
+Changed-tile ROI detection for frame uploads
+
+Splits each frame into a grid, compares the tiles against the last full
+keyframe that was uploaded, and returns only the bounding box of the tiles
+that changed. Used by extract-frames.py and livestream-monitor.py so that a
+static data-center floor with one blinking rack LED uploads a small crop
+instead of a whole JPEG.
+
+Requirements:
+    pip install numpy
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class TileUpdate:
+    """What to upload for one frame after tile diffing"""
+
+    def __init__(self, image, bbox: Tuple[int, int, int, int], frame_size: Tuple[int, int],
+                 keyframe: bool, changed_tiles: int, total_tiles: int):
+        """
+        Args:
+            image: Pixels to upload (full frame for keyframes, ROI crop otherwise)
+            bbox: (x, y, width, height) of the crop within the full frame
+            frame_size: (width, height) of the full frame
+            keyframe: True if this is a full keyframe upload
+            changed_tiles: Number of tiles that differ from the keyframe
+            total_tiles: Number of tiles in the grid
+        """
+        self.image = image
+        self.bbox = bbox
+        self.frame_size = frame_size
+        self.keyframe = keyframe
+        self.changed_tiles = changed_tiles
+        self.total_tiles = total_tiles
+
+    def to_payload(self) -> dict:
+        """ROI metadata sent alongside frameData"""
+        x, y, w, h = self.bbox
+        full_w, full_h = self.frame_size
+        return {
+            'keyframe': self.keyframe,
+            'x': x,
+            'y': y,
+            'width': w,
+            'height': h,
+            'frameWidth': full_w,
+            'frameHeight': full_h,
+            'changedTiles': self.changed_tiles,
+            'totalTiles': self.total_tiles,
+        }
+
+
+class TileDiffer:
+    def __init__(self, grid: int = 8, threshold: float = 12.0, keyframe_interval: int = 30,
+                 max_changed_ratio: float = 0.5):
+        """
+        Initialize tile differ
+
+        Args:
+            grid: Number of tiles along each axis (grid x grid tiles)
+            threshold: Mean absolute pixel difference (0-255) for a tile to count as changed
+            keyframe_interval: Send a full keyframe after this many ROI uploads
+            max_changed_ratio: Send a full keyframe when more than this fraction of tiles changed
+        """
+        if grid < 1:
+            raise ValueError("grid must be at least 1")
+        self.grid = grid
+        self.threshold = threshold
+        self.keyframe_interval = keyframe_interval
+        self.max_changed_ratio = max_changed_ratio
+        self.keyframe = None
+        self.updates_since_keyframe = 0
+
+    def process(self, frame) -> Optional[TileUpdate]:
+        """
+        Diff a frame against the last keyframe
+
+        Returns:
+            TileUpdate to upload, or None if no tile changed
+        """
+        height, width = frame.shape[:2]
+        if not height or not width:
+            raise ValueError("frame is empty")
+        grid = self._grid_for(height, width)
+        total_tiles = grid * grid
+
+        if (self.keyframe is None
+                or self.keyframe.shape != frame.shape
+                or self.updates_since_keyframe >= self.keyframe_interval):
+            return self._take_keyframe(frame, 0, total_tiles)
+
+        changed = self.changed_tiles(frame)
+        changed_count = int(changed.sum())
+
+        if changed_count == 0:
+            return None
+
+        if changed_count > self.max_changed_ratio * total_tiles:
+            return self._take_keyframe(frame, changed_count, total_tiles)
+
+        rows = np.flatnonzero(changed.any(axis=1))
+        cols = np.flatnonzero(changed.any(axis=0))
+        ys, xs = self._edges(height, width)
+        y0, y1 = ys[rows[0]], ys[rows[-1] + 1]
+        x0, x1 = xs[cols[0]], xs[cols[-1] + 1]
+
+        self.updates_since_keyframe += 1
+        return TileUpdate(
+            image=frame[y0:y1, x0:x1],
+            bbox=(int(x0), int(y0), int(x1 - x0), int(y1 - y0)),
+            frame_size=(width, height),
+            keyframe=False,
+            changed_tiles=changed_count,
+            total_tiles=total_tiles,
+        )
+
+    def changed_tiles(self, frame):
+        """Boolean (grid, grid) mask of tiles that differ from the keyframe"""
+        height, width = frame.shape[:2]
+        ys, xs = self._edges(height, width)
+
+        diff = np.abs(frame.astype(np.int16) - self.keyframe.astype(np.int16))
+        if diff.ndim == 3:
+            diff = diff.max(axis=2)
+
+        # Sum each tile in two vectorized passes, then divide by the tile area
+        sums = np.add.reduceat(np.add.reduceat(diff, ys[:-1], axis=0, dtype=np.int64), xs[:-1], axis=1)
+        areas = np.outer(np.diff(ys), np.diff(xs))
+        return (sums / areas) > self.threshold
+
+    def _grid_for(self, height: int, width: int) -> int:
+        # A tile must be at least one pixel, so small frames get a coarser grid
+        return min(self.grid, height, width)
+
+    def _edges(self, height: int, width: int):
+        grid = self._grid_for(height, width)
+        ys = np.linspace(0, height, grid + 1).astype(np.intp)
+        xs = np.linspace(0, width, grid + 1).astype(np.intp)
+        return ys, xs
+
+    def _take_keyframe(self, frame, changed_count: int, total_tiles: int) -> TileUpdate:
+        height, width = frame.shape[:2]
+        self.keyframe = frame.copy()
+        self.updates_since_keyframe = 0
+        return TileUpdate(
+            image=frame,
+            bbox=(0, 0, width, height),
+            frame_size=(width, height),
+            keyframe=True,
+            changed_tiles=changed_count,
+            total_tiles=total_tiles,
+        )
@@ -32,18 +32,69 @@ Usage:
       --camera-id <id> \
       --api-url <url> \
       --interval 5
+
+    # Upload only the changed region of each frame (full keyframe every 30 uploads)
+    python livestream-monitor.py \
+      --source 0 \
+      --camera-id <id> \
+      --api-url <url> \
+      --tile-diff \
+      --keyframe-interval 30
+
+    # Skip frames that look like anything analyzed before (index persists between runs)
+    python livestream-monitor.py \
+      --source 0 \
+      --camera-id <id> \
+      --api-url <url> \
+      --phash-radius 4
+
+    # Let a local motion detector set priority and drop frames with nothing going on
+    python livestream-monitor.py \
+      --source 0 \
+      --camera-id <id> \
+      --api-url <url> \
+      --prioritizer motion \
+      --priority-floor 0.2
+
+    # Keep every captured frame as compact H.264 segments for later backfill
+    # (requires PyAV: pip install av). Point --source at the camera website's
+    # /video_feed to archive the frames get_frame() receives from the Voxel link.
+    # Frames are read and archived on their own thread, so uploads never hold
+    # up the archive.
+    python livestream-monitor.py \
+      --source http://localhost:5000/video_feed \
+      --camera-id <id> \
+      --api-url <url> \
+      --archive-dir archive
 """
 
-import cv2
 import base64
-import requests
 import argparse
 import time
 import sys
+import threading
 from datetime import datetime
 
+# OpenCV and requests dominate startup time, so they are imported on first use
+# and `--help` or a bad argument returns instantly
+cv2 = None
+requests = None
+phash = None
+
+
+def _import_dependencies() -> None:
+    """Import OpenCV, requests and the frame helpers"""
+    global cv2, requests, phash
+    if cv2 is not None:
+        return
+    import cv2
+    import requests
+    from frame_index import phash
+
+
 class LivestreamMonitor:
-    def __init__(self, source, camera_id, api_url, interval=5, priority=5):
+    def __init__(self, source, camera_id, api_url, interval=5, priority=5, tile_differ=None,
+                 hash_index=None, prioritizer=None, archiver=None):
         """
         Initialize livestream monitor
         
@@ -53,7 +104,12 @@ class LivestreamMonitor:
             api_url: Convex API URL
             interval: Seconds between frame captures
             priority: Frame priority (1-10)
+            tile_differ: Optional TileDiffer to upload only changed regions
+            hash_index: Optional FrameHashIndex of previously analyzed frames to skip
+            prioritizer: Optional FramePrioritizer that sets priority per frame (priority becomes the minimum)
+            archiver: Optional SegmentArchiver that keeps every captured frame as H.264
         """
+        _import_dependencies()
         self.source = source
         self.camera_id = camera_id
         self.api_url = api_url.rstrip('/') + '/api/analyze-frame'
@@ -63,7 +119,19 @@ class LivestreamMonitor:
         self.frames_sent = 0
         self.frames_cached = 0
         self.frames_skipped = 0
+        self.frames_unchanged = 0
+        self.frames_duplicate = 0
+        self.frames_low_priority = 0
+        self.bytes_sent = 0
         self.last_sent_time = 0
+        self.last_candidate_time = 0
+        self.tile_differ = tile_differ
+        self.hash_index = hash_index
+        self.prioritizer = prioritizer
+        self.archiver = archiver
+        # Newest (frame, frame number, capture time) from the capture thread
+        self._latest = None
+        self._frame_cond = threading.Condition()
         
     def start(self):
         """Start monitoring the livestream"""
@@ -72,10 +140,19 @@ class LivestreamMonitor:
         print(f"   Camera ID: {self.camera_id}")
         print(f"   Interval: {self.interval}s")
         print(f"   Priority: {self.priority}")
+        if self.prioritizer:
+            print(f"   Prioritizer: {self.prioritizer.backend} (drop below {self.prioritizer.floor}, "
+                  f"best of {self.prioritizer.batch_size} frames per interval)")
+        if self.tile_differ:
+            print(f"   Tile diff: {self.tile_differ.grid}x{self.tile_differ.grid} grid, "
+                  f"keyframe every {self.tile_differ.keyframe_interval} uploads")
+        if self.archiver:
+            print(f"   Archive: {self.archiver.archive_dir}")
         print("\n⚠️  WARNING: This will continuously use API credits!")
         print("   Press Ctrl+C to stop\n")
         
         # Open video source
+        frame_delay = 0.0
         if isinstance(self.source, str) and self.source.startswith(('http', 'rtsp')):
             # URL source
             cap = cv2.VideoCapture(self.source)
@@ -85,8 +162,11 @@ class LivestreamMonitor:
                 source_idx = int(self.source)
                 cap = cv2.VideoCapture(source_idx)
             except ValueError:
-                # File path
+                # File path, played back at its own frame rate
                 cap = cv2.VideoCapture(self.source)
+                file_fps = cap.get(cv2.CAP_PROP_FPS)
+                if file_fps > 0:
+                    frame_delay = 1.0 / file_fps
         
         if not cap.isOpened():
             print(f"❌ Error: Could not open video source: {self.source}")
@@ -95,46 +175,127 @@ class LivestreamMonitor:
         print("✅ Video source opened successfully\n")
         
         self.running = True
-        frame_count = 0
+        reader = threading.Thread(target=self._read_frames, args=(cap, frame_delay), name="capture", daemon=True)
+        reader.start()
+        last_frame = 0
+        candidates = []
         
         try:
             while self.running:
-                ret, frame = cap.read()
-                
-                if not ret:
-                    print("⚠️  Warning: Failed to read frame, retrying...")
-                    time.sleep(1)
+                with self._frame_cond:
+                    self._frame_cond.wait_for(
+                        lambda: self._latest is not None and self._latest[1] != last_frame, timeout=1.0)
+                    latest = self._latest
+                if latest is None or latest[1] == last_frame:
                     continue
+                frame, frame_count, current_time = latest
+                last_frame = frame_count
                 
-                frame_count += 1
-                current_time = time.time()
+                # With a prioritizer, sample frames across the interval so they can be scored in one batch
+                if self.prioritizer and current_time - self.last_candidate_time >= self.interval / self.prioritizer.batch_size:
+                    candidates.append((frame, frame_count))
+                    self.last_candidate_time = current_time
                 
                 # Check if it's time to send a frame
                 if current_time - self.last_sent_time >= self.interval:
-                    self.send_frame(frame, frame_count)
+                    if self.prioritizer:
+                        self.send_best_frame(candidates or [(frame, frame_count)])
+                        candidates = []
+                    else:
+                        self.send_frame(frame, frame_count)
                     self.last_sent_time = current_time
                 
-                # Small sleep to prevent CPU overuse
-                time.sleep(0.1)
-                
         except KeyboardInterrupt:
             print("\n\n⏹️  Stopping monitor...")
         finally:
+            self.running = False
+            reader.join(timeout=5)
             cap.release()
+            if self.hash_index is not None:
+                self.hash_index.close()
+            if self.archiver:
+                self.archiver.close()
             self.print_stats()
     
-    def send_frame(self, frame, frame_number):
+    def _read_frames(self, cap, frame_delay):
+        """Read every frame and archive it, independent of how long uploads take"""
+        frame_count = 0
+        while self.running:
+            ret, frame = cap.read()
+            
+            if not ret:
+                print("⚠️  Warning: Failed to read frame, retrying...")
+                time.sleep(1)
+                continue
+            
+            frame_count += 1
+            current_time = time.time()
+            
+            if self.archiver:
+                self.archiver.submit(frame, current_time)
+            
+            with self._frame_cond:
+                self._latest = (frame, frame_count, current_time)
+                self._frame_cond.notify_all()
+            
+            if frame_delay:
+                time.sleep(frame_delay)
+    
+    def send_best_frame(self, candidates):
+        """Score the frames sampled since the last upload in one batch and send the most relevant one"""
+        scores = self.prioritizer.score_batch([frame for frame, _ in candidates])
+        best = max(range(len(candidates)), key=scores.__getitem__)
+        frame, frame_number = candidates[best]
+        
+        priority = self.prioritizer.priority_for(scores[best], self.priority)
+        if priority is None:
+            self.frames_low_priority += 1
+            timestamp = datetime.now().strftime("%H:%M:%S")
+            print(f"[{timestamp}] Frame {frame_number:6d}: 💤 LOW PRIORITY (best of {len(candidates)}, not sent)")
+            return
+        
+        self.send_frame(frame, frame_number, priority)
+    
+    def send_frame(self, frame, frame_number, priority=None):
         """Send a single frame to the API"""
+        if priority is None:
+            priority = self.priority
+        
+        frame_hash = None
+        if self.hash_index is not None:
+            frame_hash = phash(frame)
+            match = self.hash_index.lookup(frame_hash)
+            if match:
+                self.frames_duplicate += 1
+                timestamp = datetime.now().strftime("%H:%M:%S")
+                ref = f" of {match[1]}" if match[1] else ""
+                print(f"[{timestamp}] Frame {frame_number:6d}: 🔁 DUPLICATE{ref} (distance {match[2]}, not sent)")
+                return
+        
+        roi = None
+        if self.tile_differ:
+            update = self.tile_differ.process(frame)
+            if update is None:
+                self.frames_unchanged += 1
+                timestamp = datetime.now().strftime("%H:%M:%S")
+                print(f"[{timestamp}] Frame {frame_number:6d}: 🟰 UNCHANGED (not sent)")
+                return
+            frame = update.image
+            roi = update.to_payload()
+
         # Encode frame to JPEG
         _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
         frame_b64 = base64.b64encode(buffer).decode('utf-8')
+        self.bytes_sent += len(buffer)
         
         # Send to API
         payload = {
             'cameraId': self.camera_id,
             'frameData': frame_b64,
-            'priority': self.priority
+            'priority': priority
         }
+        if roi:
+            payload['roi'] = roi
         
         try:
             response = requests.post(self.api_url, json=payload, timeout=30)
@@ -144,6 +305,9 @@ class LivestreamMonitor:
             # Track results
             timestamp = datetime.now().strftime("%H:%M:%S")
             
+            if frame_hash is not None and (result.get('cached') or result.get('queued')):
+                self.hash_index.add(frame_hash, result.get('analysisId') or result.get('queueId') or '')
+            
             if result.get('cached'):
                 self.frames_cached += 1
                 status = "💾 CACHED"
@@ -156,6 +320,11 @@ class LivestreamMonitor:
             else:
                 status = "❓ UNKNOWN"
             
+            if self.prioritizer:
+                status += f" [P{priority}]"
+            if roi and not roi['keyframe']:
+                status += f" (ROI {roi['width']}x{roi['height']}, {roi['changedTiles']}/{roi['totalTiles']} tiles)"
+            
             print(f"[{timestamp}] Frame {frame_number:6d}: {status}")
             
         except requests.exceptions.RequestException as e:
@@ -172,6 +341,16 @@ class LivestreamMonitor:
         print(f"   Sent for analysis: {self.frames_sent}")
         print(f"   Cached (instant): {self.frames_cached}")
         print(f"   Skipped (similar): {self.frames_skipped}")
+        if self.tile_differ:
+            print(f"   Unchanged (not sent): {self.frames_unchanged}")
+        if self.hash_index is not None:
+            print(f"   Duplicates (not sent): {self.frames_duplicate}")
+        if self.prioritizer:
+            print(f"   Low priority (not sent): {self.frames_low_priority}")
+        print(f"   Uploaded: {self.bytes_sent / 1024:.1f} KB")
+        if self.archiver:
+            print(f"   Archived: {self.archiver.frames_archived} frames, "
+                  f"{self.archiver.bytes_written / 1024:.1f} KB ({self.archiver.frames_dropped} dropped)")
         
         if total > 0:
             cache_rate = (self.frames_cached / total) * 100
@@ -197,15 +376,85 @@ def main():
                        help='Seconds between frames (default: 5)')
     parser.add_argument('--priority', type=int, default=5, choices=range(1, 11),
                        help='Frame priority 1-10 (default: 5)')
+    parser.add_argument('--tile-diff', action='store_true',
+                       help='Upload only tiles that changed since the last keyframe')
+    parser.add_argument('--tile-grid', type=int, default=8,
+                       help='Tiles per side for --tile-diff (default: 8)')
+    parser.add_argument('--tile-threshold', type=float, default=12.0,
+                       help='Mean pixel difference for a tile to count as changed (default: 12)')
+    parser.add_argument('--keyframe-interval', type=int, default=30,
+                       help='Full keyframe after this many ROI uploads (default: 30)')
+    parser.add_argument('--phash-radius', type=int,
+                       help='Skip frames within this Hamming distance (0-63) of any previously analyzed frame')
+    parser.add_argument('--phash-index-dir', default='.frame_index',
+                       help='Directory for the per-camera perceptual hash index (default: .frame_index)')
+    parser.add_argument('--prioritizer', choices=['motion', 'hog', 'dnn'],
+                       help='Score frames locally and set priority dynamically (--priority becomes the minimum)')
+    parser.add_argument('--priority-floor', type=float, default=0.1,
+                       help='Drop frames scoring below this (0-1) with --prioritizer (default: 0.1)')
+    parser.add_argument('--priority-batch', type=int, default=8,
+                       help='Frames sampled per interval and scored together with --prioritizer; '
+                            'the most relevant one is sent (default: 8)')
+    parser.add_argument('--dnn-model', help='Detector weights for --prioritizer dnn')
+    parser.add_argument('--dnn-config', help='Detector config for --prioritizer dnn (e.g. .prototxt)')
+    parser.add_argument('--dnn-person-class', type=int, default=15,
+                       help='Person class ID in the detector label map (default: 15, VOC MobileNet-SSD)')
+    parser.add_argument('--archive-dir',
+                       help='Archive every captured frame as H.264 segments under this directory '
+                            '(for a camera website /video_feed source, run the website with Frame_source=bus)')
+    parser.add_argument('--archive-segment-seconds', type=float, default=300.0,
+                       help='Length of each archive segment (default: 300)')
+    parser.add_argument('--archive-retention-hours', type=float,
+                       help='Delete archive segments older than this (default: keep everything)')
     
     args = parser.parse_args()
     
+    tile_differ = None
+    if args.tile_diff:
+        from frame_tiles import TileDiffer
+        tile_differ = TileDiffer(
+            grid=args.tile_grid,
+            threshold=args.tile_threshold,
+            keyframe_interval=args.keyframe_interval
+        )
+
+    hash_index = None
+    if args.phash_radius is not None:
+        from frame_index import PersistentFrameHashIndex
+        hash_index = PersistentFrameHashIndex(args.phash_index_dir, args.camera_id, args.phash_radius)
+        print(f"🗂️  Loaded {len(hash_index)} indexed frames from {hash_index.path}")
+
+    prioritizer = None
+    if args.prioritizer:
+        from frame_priority import FramePrioritizer
+        prioritizer = FramePrioritizer(
+            backend=args.prioritizer,
+            floor=args.priority_floor,
+            batch_size=args.priority_batch,
+            model_path=args.dnn_model,
+            config_path=args.dnn_config,
+            person_class=args.dnn_person_class
+        )
+
+    archiver = None
+    if args.archive_dir:
+        from frame_archive import SegmentArchiver, archive_dir_for
+        archiver = SegmentArchiver(
+            archive_dir_for(args.archive_dir, args.camera_id),
+            segment_seconds=args.archive_segment_seconds,
+            retention_hours=args.archive_retention_hours
+        )
+    
     monitor = LivestreamMonitor(
         source=args.source,
         camera_id=args.camera_id,
         api_url=args.api_url,
         interval=args.interval,
-        priority=args.priority
+        priority=args.priority,
+        tile_differ=tile_differ,
+        hash_index=hash_index,
+        prioritizer=prioritizer,
+        archiver=archiver
     )
     
     monitor.start()
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Open-Loop Load Generator for the Frame Analysis API
+
+Replays a directory of recorded frames (or synthetic ones) against
+/api/analyze-frame from many simulated cameras at configurable arrival
+rates, and reports achieved throughput, latency percentiles and
+cached/skipped/queued ratios over time. Use it with mock-frame-api.py to
+size BATCH_SIZE, SIMILARITY_THRESHOLD and cameras per deployment offline.
+
+Requests are sent on a fixed schedule regardless of how fast the server
+answers (open loop), and latency is measured from the scheduled send time,
+so a slow server shows up as growing latency instead of a quietly lower
+request rate.
+
+WARNING: Against a real deployment this uses API credits like real cameras.
+
+Requirements:
+    pip install requests
+    pip install pillow   # only for --synthetic
+
+Usage:
+    # 20 cameras at 0.2 frames/s each with Poisson arrivals, against the local mock
+    python load-test.py --frames-dir recorded/ --cameras 20 --rate 0.2 --api-url http://localhost:8787
+
+    # Bursty cameras (10-frame bursts), synthetic frames where half repeat the previous one
+    python load-test.py --synthetic --repeat-ratio 0.5 --cameras 50 --rate 1 --pattern burst \\
+      --burst-size 10 --duration 120 --api-url http://localhost:8787
+
+    # Save the per-interval timeline for plotting
+    python load-test.py --frames-dir recorded/ --cameras 10 --api-url http://localhost:8787 --csv run.csv
+"""
+
+import argparse
+import base64
+import csv
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+# requests is imported on first use so `--help` or a bad argument returns instantly
+requests = None
+
+OUTCOMES = ('cached', 'skipped', 'queued', 'error')
+
+
+def _import_dependencies():
+    """Import requests"""
+    global requests
+    if requests is None:
+        import requests
+
+
+def load_frames(frames_dir: str, limit: int) -> List[str]:
+    """Read up to `limit` JPEG/PNG files from a directory as base64 strings"""
+    names = sorted(
+        name for name in os.listdir(frames_dir)
+        if name.lower().endswith(('.jpg', '.jpeg', '.png'))
+    )[:limit]
+    if not names:
+        print(f"❌ No .jpg/.png frames found in {frames_dir}")
+        sys.exit(1)
+
+    frames = []
+    for name in names:
+        with open(os.path.join(frames_dir, name), 'rb') as f:
+            frames.append(base64.b64encode(f.read()).decode('utf-8'))
+    return frames
+
+
+def synthetic_frames(count: int, width: int = 640, height: int = 480) -> List[str]:
+    """Generate distinct noisy JPEG frames with Pillow"""
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        print("❌ Pillow not installed. Run: pip install pillow")
+        sys.exit(1)
+
+    import io
+
+    frames = []
+    for i in range(count):
+        img = Image.effect_noise((width, height), 40).convert('RGB')
+        draw = ImageDraw.Draw(img)
+        draw.rectangle([40 + (i * 37) % (width - 200), 60, 200 + (i * 37) % (width - 200), 260],
+                       outline=(255, 255, 255), width=4)
+        draw.text((20, 20), f"Synthetic frame {i}", fill=(255, 255, 0))
+        buffer = io.BytesIO()
+        img.save(buffer, 'JPEG', quality=85)
+        frames.append(base64.b64encode(buffer.getvalue()).decode('utf-8'))
+    return frames
+
+
+def arrival_times(pattern: str, rate: float, duration: float, burst_size: int,
+                  burst_rate: float, rng: random.Random) -> List[float]:
+    """
+    Send times (seconds from start) for one camera
+
+    Args:
+        pattern: 'poisson', 'constant' or 'burst'
+        rate: Average frames per second
+        duration: Length of the run in seconds
+        burst_size: Frames per burst (burst pattern)
+        burst_rate: Frames per second within a burst (burst pattern)
+        rng: Random source (seeded per camera)
+    """
+    times = []
+    if pattern == 'constant':
+        t = rng.uniform(0, 1.0 / rate)
+        while t < duration:
+            times.append(t)
+            t += 1.0 / rate
+    elif pattern == 'poisson':
+        t = rng.expovariate(rate)
+        while t < duration:
+            times.append(t)
+            t += rng.expovariate(rate)
+    else:
+        # Bursts arrive as a Poisson process; the average rate stays `rate`
+        t = rng.expovariate(rate / burst_size)
+        while t < duration:
+            for i in range(burst_size):
+                send_at = t + i / burst_rate
+                if send_at < duration:
+                    times.append(send_at)
+            t += rng.expovariate(rate / burst_size)
+    return times
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+class LoadGenerator:
+    def __init__(self, api_url: str, camera_ids: List[str], frames: List[str], rate: float,
+                 pattern: str = 'poisson', duration: float = 60, burst_size: int = 10,
+                 burst_rate: float = 10.0, repeat_ratio: float = 0.0, priority: int = 1,
+                 concurrency: int = 64, timeout: float = 30, seed: int = 0):
+        """
+        Initialize load generator
+
+        Args:
+            api_url: Convex deployment URL or mock server URL
+            camera_ids: Camera IDs to simulate (one arrival process each)
+            frames: Base64 frames to replay; each camera walks the list from its own offset
+            rate: Average frames per second per camera
+            pattern: Arrival pattern ('poisson', 'constant' or 'burst')
+            duration: Seconds to generate load for
+            burst_size: Frames per burst (burst pattern)
+            burst_rate: Frames per second within a burst (burst pattern)
+            repeat_ratio: Probability a camera resends its previous frame (static scene)
+            priority: Frame priority sent with every request
+            concurrency: Maximum in-flight requests
+            timeout: Request timeout in seconds
+            seed: Random seed for reproducible schedules
+        """
+        _import_dependencies()
+        self.api_url = api_url.rstrip('/')
+        self.camera_ids = camera_ids
+        self.frames = frames
+        self.rate = rate
+        self.pattern = pattern
+        self.duration = duration
+        self.burst_size = burst_size
+        self.burst_rate = burst_rate
+        self.repeat_ratio = repeat_ratio
+        self.priority = priority
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+
+        self.lock = threading.Lock()
+        # (completed at, latency from scheduled time, service time, outcome)
+        self.results: List[Tuple[float, float, float, str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.dropped = 0
+        self._local = threading.local()
+
+    def schedule(self) -> List[Tuple[float, str, str]]:
+        """Build the full (send time, camera, frame) schedule up front"""
+        schedule = []
+        for n, camera_id in enumerate(self.camera_ids):
+            rng = random.Random(self.rng.random())
+            position = n * 7 % len(self.frames)
+            previous = None
+            for send_at in arrival_times(self.pattern, self.rate, self.duration,
+                                         self.burst_size, self.burst_rate, rng):
+                if previous is not None and rng.random() < self.repeat_ratio:
+                    frame = previous
+                else:
+                    frame = self.frames[position % len(self.frames)]
+                    position += 1
+                schedule.append((send_at, camera_id, frame))
+                previous = frame
+        schedule.sort(key=lambda item: item[0])
+        return schedule
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def _send(self, scheduled_at: float, camera_id: str, frame: str) -> None:
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = self._session().post(
+                f"{self.api_url}/api/analyze-frame",
+                json={'cameraId': camera_id, 'frameData': frame, 'priority': self.priority},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            result = response.json()
+            if result.get('cached'):
+                outcome = 'cached'
+            elif result.get('skipped'):
+                outcome = 'skipped'
+            elif result.get('queued'):
+                outcome = 'queued'
+        except (requests.exceptions.RequestException, ValueError):
+            pass
+        finally:
+            done = time.perf_counter()
+            with self.lock:
+                self.in_flight -= 1
+                self.results.append((done, done - scheduled_at, done - started, outcome))
+
+    def run(self, report_interval: float = 5.0, csv_path: Optional[str] = None) -> None:
+        """Generate load, print a line per interval and a final summary"""
+        schedule = self.schedule()
+        print("🚦 Starting open-loop load test...")
+        print(f"   API URL: {self.api_url}")
+        print(f"   Cameras: {len(self.camera_ids)} x {self.rate} fps ({self.pattern})")
+        print(f"   Offered load: {len(schedule) / self.duration:.2f} req/s over {self.duration:.0f}s")
+        print(f"   Frames: {len(self.frames)} distinct, repeat ratio {self.repeat_ratio}")
+        print(f"   Max in flight: {self.concurrency}\n")
+
+        print(f"{'time':>6} {'sent/s':>7} {'done/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'cached':>7} {'skipped':>8} {'queued':>7} {'errors':>7} {'inflt':>6}")
+
+        timeline = []
+        sent = [0]
+        reporter_stop = threading.Event()
+        start = time.perf_counter()
+
+        def report_loop():
+            last_index = 0
+            last_sent = 0
+            while not reporter_stop.wait(report_interval):
+                with self.lock:
+                    window = self.results[last_index:]
+                    last_index = len(self.results)
+                    in_flight = self.in_flight
+                row = self._report_row(time.perf_counter() - start, window, sent[0] - last_sent,
+                                       report_interval, in_flight)
+                last_sent = sent[0]
+                timeline.append(row)
+
+        reporter = threading.Thread(target=report_loop, daemon=True)
+        reporter.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                for send_at, camera_id, frame in schedule:
+                    delay = start + send_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    with self.lock:
+                        if self.in_flight >= self.concurrency:
+                            # Client saturated: count it rather than silently queueing behind
+                            self.dropped += 1
+                            continue
+                        self.in_flight += 1
+                        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                    sent[0] += 1
+                    pool.submit(self._send, start + send_at, camera_id, frame)
+        except KeyboardInterrupt:
+            print("\n⏹️  Stopping load test (waiting for in-flight requests)...")
+        finally:
+            reporter_stop.set()
+            reporter.join()
+            self.print_summary(time.perf_counter() - start, len(schedule))
+            if csv_path:
+                self._write_csv(csv_path, timeline)
+
+    def _report_row(self, elapsed: float, window, sent: int, interval: float, in_flight: int) -> dict:
+        latencies = sorted(r[1] * 1000 for r in window)
+        counts = {outcome: sum(1 for r in window if r[3] == outcome) for outcome in OUTCOMES}
+        total = max(len(window), 1)
+        row = {
+            'elapsed_s': round(elapsed, 1),
+            'sent_per_s': sent / interval,
+            'done_per_s': len(window) / interval,
+            'p50_ms': percentile(latencies, 0.50),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'in_flight': in_flight,
+        }
+        for outcome in OUTCOMES:
+            row[f"{outcome}_ratio"] = counts[outcome] / total
+        print(f"{row['elapsed_s']:6.0f} {row['sent_per_s']:7.1f} {row['done_per_s']:7.1f} "
+              f"{row['p50_ms']:8.0f} {row['p95_ms']:8.0f} {row['p99_ms']:8.0f} "
+              f"{row['cached_ratio']:7.0%} {row['skipped_ratio']:8.0%} {row['queued_ratio']:7.0%} "
+              f"{row['error_ratio']:7.0%} {in_flight:6d}")
+        return row
+
+    def _write_csv(self, path: str, timeline: List[dict]) -> None:
+        if not timeline:
+            return
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(timeline[0].keys()))
+            writer.writeheader()
+            writer.writerows(timeline)
+        print(f"📝 Timeline written to {path}")
+
+    def print_summary(self, elapsed: float, scheduled: int) -> None:
+        with self.lock:
+            results = list(self.results)
+        latencies = sorted(r[1] * 1000 for r in results)
+        service = sorted(r[2] * 1000 for r in results)
+        counts = {outcome: sum(1 for r in results if r[3] == outcome) for outcome in OUTCOMES}
+        total = len(results)
+
+        print("\n" + "="*50)
+        print("📊 Load Test Results")
+        print("="*50)
+        print(f"   Scheduled: {scheduled}")
+        print(f"   Completed: {total}")
+        print(f"   Dropped (client saturated): {self.dropped}")
+        print(f"   Max in flight: {self.max_in_flight}")
+        print(f"   Achieved throughput: {total / elapsed:.2f} req/s")
+
+        if total:
+            print(f"\n   Latency from scheduled send (ms): p50 {percentile(latencies, 0.5):.0f}, "
+                  f"p95 {percentile(latencies, 0.95):.0f}, p99 {percentile(latencies, 0.99):.0f}, "
+                  f"max {latencies[-1]:.0f}")
+            print(f"   Service time (ms):                p50 {percentile(service, 0.5):.0f}, "
+                  f"p95 {percentile(service, 0.95):.0f}, p99 {percentile(service, 0.99):.0f}")
+            print()
+            for outcome in OUTCOMES:
+                print(f"   {outcome.capitalize():8s} {counts[outcome]:7d} ({counts[outcome] / total * 100:5.1f}%)")
+            print(f"\n   Frames reaching the vision model: {counts['queued'] / total * 100:.1f}%")
+
+    def print_cache_stats(self) -> None:
+        """Show the server's own view after the run"""
+        try:
+            response = self._session().get(f"{self.api_url}/api/cache-stats", timeout=self.timeout)
+            response.raise_for_status()
+            stats = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"\n   ⚠️  Could not fetch cache stats: {e}")
+            return
+
+        print("\n📈 Server Cache Statistics:")
+        print(f"   Cache Entries: {stats['cache']['totalEntries']}")
+        print(f"   Cache Hits: {stats['cache']['totalHits']}")
+        print(f"   Hit Rate: {stats['cache']['hitRate']}")
+        print(f"   Queue Pending: {stats['queue']['pending']}")
+        print(f"   Queue Processing: {stats['queue']['processing']}")
+        print(f"   Queue Completed: {stats['queue']['completed']}")
+        print(f"   Queue Failed: {stats['queue']['failed']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Open-loop load generator for the frame analysis API"
+    )
+
+    # Frame source (one required)
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument('--frames-dir', help='Directory of recorded .jpg/.png frames to replay')
+    source_group.add_argument('--synthetic', action='store_true', help='Generate synthetic frames (needs Pillow)')
+
+    parser.add_argument('--api-url', required=True, help='Convex deployment URL or mock server URL')
+
+    # Load shape
+    parser.add_argument('--cameras', type=int, default=10, help='Simulated cameras (default: 10)')
+    parser.add_argument('--camera-ids',
+                       help='Comma-separated camera IDs (required for a real deployment; overrides --cameras)')
+    parser.add_argument('--rate', type=float, default=0.2,
+                       help='Average frames per second per camera (default: 0.2)')
+    parser.add_argument('--pattern', choices=['poisson', 'constant', 'burst'], default='poisson',
+                       help='Arrival pattern per camera (default: poisson)')
+    parser.add_argument('--burst-size', type=int, default=10, help='Frames per burst (default: 10)')
+    parser.add_argument('--burst-rate', type=float, default=10.0,
+                       help='Frames per second within a burst (default: 10)')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run (default: 60)')
+    parser.add_argument('--repeat-ratio', type=float, default=0.0,
+                       help='Probability a camera resends its previous frame (default: 0)')
+    parser.add_argument('--frame-limit', type=int, default=500,
+                       help='Maximum frames to load or generate (default: 500)')
+    parser.add_argument('--priority', type=int, default=1, choices=range(1, 11),
+                       help='Frame priority 1-10 (default: 1)')
+
+    # Client and reporting
+    parser.add_argument('--concurrency', type=int, default=64, help='Maximum in-flight requests (default: 64)')
+    parser.add_argument('--timeout', type=float, default=30, help='Request timeout in seconds (default: 30)')
+    parser.add_argument('--report-interval', type=float, default=5, help='Seconds between report lines (default: 5)')
+    parser.add_argument('--csv', help='Write the per-interval timeline to this CSV file')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--stats', action='store_true', help='Show server cache stats after the run')
+
+    args = parser.parse_args()
+
+    if args.frames_dir:
+        frames = load_frames(args.frames_dir, args.frame_limit)
+    else:
+        print(f"🎨 Generating {args.frame_limit} synthetic frames...")
+        frames = synthetic_frames(args.frame_limit)
+
+    if args.camera_ids:
+        camera_ids = [c for c in args.camera_ids.split(',') if c]
+    else:
+        camera_ids = [f"cam-{i}" for i in range(args.cameras)]
+
+    generator = LoadGenerator(
+        api_url=args.api_url,
+        camera_ids=camera_ids,
+        frames=frames,
+        rate=args.rate,
+        pattern=args.pattern,
+        duration=args.duration,
+        burst_size=args.burst_size,
+        burst_rate=args.burst_rate,
+        repeat_ratio=args.repeat_ratio,
+        priority=args.priority,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        seed=args.seed
+    )
+
+    generator.run(report_interval=args.report_interval, csv_path=args.csv)
+
+    if args.stats:
+        generator.print_cache_stats()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Local Stand-in for the Frame Analysis API
+
+Serves /api/analyze-frame, /api/cache-stats and /api/health with the same
+request/response shapes as the Convex deployment, so load tests and the
+ingest scripts can run offline. The dedup logic mirrors
+convex/agents/frameProcessor.ts: an exact-hash cache, a "too similar to the
+last 10 frames completed in the past 5 minutes" skip and batching of queued
+frames. Like submitFrame, the request that fills a batch runs it inline, one
+vision call per frame, so it blocks for about batch size x analysis latency.
+Latencies are tunable.
+
+Requirements:
+    None (standard library only; numpy speeds up frame hashing if installed)
+
+Usage:
+    # Start on port 8787 with production-like defaults
+    python mock-frame-api.py --port 8787
+
+    # Slow vision model and a bigger batch
+    python mock-frame-api.py --analysis-latency-ms 4000 --batch-size 10
+
+    # Point any client at it
+    python livestream-monitor.py --source 0 --camera-id cam-0 --api-url http://localhost:8787
+"""
+
+import argparse
+import bisect
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# Optional: vectorized frame hashing, imported when the server starts so `--help` stays instant
+np = None
+
+
+def _import_optional_dependencies() -> None:
+    global np
+    try:
+        import numpy as np
+    except ImportError:  # pragma: no cover - optional dependency
+        np = None
+
+
+BASE36 = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def _to_base36(value: int) -> str:
+    """Number.prototype.toString(36) for a 32-bit signed integer"""
+    if value == 0:
+        return '0'
+    sign = '-' if value < 0 else ''
+    value = abs(value)
+    digits = []
+    while value:
+        value, rem = divmod(value, 36)
+        digits.append(BASE36[rem])
+    return sign + ''.join(reversed(digits))
+
+
+_powers = None
+
+
+def hash_frame(frame_data: str) -> str:
+    """Port of hashFrame() from frameProcessor.ts (31-multiplier rolling hash, int32)"""
+    global _powers
+    if np is not None:
+        # hash = sum(c_i * 31^(n-1-i)) mod 2^32; uint32 arithmetic wraps the same way
+        codes = np.frombuffer(frame_data.encode('ascii', 'replace'), dtype=np.uint8).astype(np.uint32)
+        n = len(codes)
+        if _powers is None or len(_powers) < n:
+            _powers = np.cumprod(np.full(max(n, 1), 31, dtype=np.uint32), dtype=np.uint32)
+            _powers = np.concatenate(([np.uint32(1)], _powers[:-1]))
+        value = int(np.sum(codes * _powers[:n][::-1], dtype=np.uint32))
+    else:
+        value = 0
+        for ch in frame_data:
+            value = (value * 31 + ord(ch)) & 0xFFFFFFFF
+    if value >= 2 ** 31:
+        value -= 2 ** 32
+    return _to_base36(value)
+
+
+def calculate_similarity(hash1: str, hash2: str) -> float:
+    """Port of calculateSimilarity() from frameProcessor.ts"""
+    if hash1 == hash2:
+        return 1.0
+    length = min(len(hash1), len(hash2))
+    if length == 0:
+        return 0.0
+    matches = sum(1 for a, b in zip(hash1[:length], hash2[:length]) if a == b)
+    return matches / length
+
+
+class MockFrameProcessor:
+    def __init__(self, batch_size: int = 5, similarity_threshold: float = 0.95, recent_limit: int = 10,
+                 recent_window: float = 300.0, cache_expiry: float = 24 * 3600.0,
+                 analysis_latency: float = 2.0, failure_rate: float = 0.0):
+        """
+        Initialize in-memory frame processor
+
+        Args:
+            batch_size: Pending frames per camera that trigger batch processing
+            similarity_threshold: Skip frames more similar than this to a recent frame
+            recent_limit: How many recent frames per camera to compare against
+            recent_window: Only frames completed and queued within this many seconds count as recent
+            cache_expiry: Seconds a cached analysis stays valid
+            analysis_latency: Seconds the vision model takes per frame
+            failure_rate: Fraction of frames whose analysis fails
+        """
+        _import_optional_dependencies()
+        self.batch_size = batch_size
+        self.similarity_threshold = similarity_threshold
+        self.recent_limit = recent_limit
+        self.recent_window = recent_window
+        self.cache_expiry = cache_expiry
+        self.analysis_latency = analysis_latency
+        self.failure_rate = failure_rate
+
+        self.lock = threading.Lock()
+        self.cache = {}           # (camera, hash) -> {'analysisId', 'hitCount', 'timestamp'}
+        self.pending = {}         # camera -> {queue id: entry} still in status pending
+        self.completed = {}       # camera -> completed entries sorted by queue timestamp
+        self.frames = {}          # queue id -> entry
+        self.batches = {}         # batch id -> status
+
+    def submit(self, camera_id: str, frame_data: str, priority: int, roi: Optional[dict] = None) -> dict:
+        frame_hash = hash_frame(frame_data)
+        if roi and not roi.get('keyframe'):
+            # Crops are keyed by position too, like submitFrame
+            frame_hash += f"@{roi['x']},{roi['y']},{roi['width']}x{roi['height']}"
+
+        with self.lock:
+            now = time.time()
+            cached = self.cache.get((camera_id, frame_hash))
+            if cached and cached['timestamp'] >= now - self.cache_expiry:
+                cached['hitCount'] += 1
+                return {
+                    'cached': True,
+                    'analysisId': cached['analysisId'],
+                    'message': 'Frame already analyzed (cache hit)',
+                }
+
+            if any(calculate_similarity(entry['frameHash'], frame_hash) > self.similarity_threshold
+                   for entry in self._recent_frames(camera_id, now)):
+                return {
+                    'cached': False,
+                    'skipped': True,
+                    'message': 'Frame too similar to recent frames (skipped)',
+                }
+
+            queue_id = f"q_{uuid.uuid4().hex[:16]}"
+            entry = {'id': queue_id, 'cameraId': camera_id, 'frameHash': frame_hash,
+                     'priority': priority, 'status': 'pending', 'timestamp': now}
+            self.frames[queue_id] = entry
+            pending = self.pending.setdefault(camera_id, {})
+            pending[queue_id] = entry
+            # getPendingCount runs after the insert, so it includes this frame
+            pending_count = len(pending)
+
+        if pending_count >= self.batch_size:
+            # submitFrame awaits processBatch, so the request that fills a batch waits for all of it
+            self._process_batch(camera_id)
+
+        return {
+            'cached': False,
+            'skipped': False,
+            'queued': True,
+            'queueId': queue_id,
+            'message': f"Frame queued ({pending_count + 1}/{self.batch_size} in batch)",
+        }
+
+    def _recent_frames(self, camera_id: str, now: float) -> list:
+        """getRecentFrames: newest completed frames queued within the recent window"""
+        completed = self.completed.get(camera_id)
+        if not completed:
+            return []
+        cutoff = bisect.bisect_left(completed, (now - self.recent_window,))
+        if cutoff:
+            del completed[:cutoff]
+        return [entry for _, _, entry in completed[-self.recent_limit:]]
+
+    def _process_batch(self, camera_id: str) -> None:
+        with self.lock:
+            # Highest priority first, like getPendingFrames; a concurrent batch may pick the same frames
+            pending = self.pending.get(camera_id, {}).values()
+            batch = sorted(pending, key=lambda e: -e['priority'])[:self.batch_size]
+            if not batch:
+                return
+            batch_id = f"b_{uuid.uuid4().hex[:16]}"
+            self.batches[batch_id] = 'processing'
+
+        # One vision call per frame, in sequence
+        for entry in batch:
+            with self.lock:
+                entry['status'] = 'processing'
+                self.pending[camera_id].pop(entry['id'], None)
+            time.sleep(max(0.0, self.analysis_latency * random.uniform(0.8, 1.2)))
+            failed = random.random() < self.failure_rate
+            with self.lock:
+                if failed:
+                    entry['status'] = 'failed'
+                    continue
+                self.cache[(camera_id, entry['frameHash'])] = {
+                    'analysisId': f"a_{uuid.uuid4().hex[:16]}",
+                    'hitCount': 0,
+                    'timestamp': time.time(),
+                }
+                entry['status'] = 'completed'
+                bisect.insort(self.completed.setdefault(camera_id, []),
+                              (entry['timestamp'], entry['id'], entry))
+
+        with self.lock:
+            self.batches[batch_id] = 'completed'
+
+    def stats(self) -> dict:
+        with self.lock:
+            total_hits = sum(c['hitCount'] for c in self.cache.values())
+            statuses = [f['status'] for f in self.frames.values()]
+            batch_statuses = list(self.batches.values())
+            total_frames = len(statuses) + total_hits
+            hit_rate = (total_hits / total_frames) * 100 if total_frames else 0
+            return {
+                'cache': {
+                    'totalEntries': len(self.cache),
+                    'totalHits': total_hits,
+                    'hitRate': f"{hit_rate:.2f}%",
+                },
+                'queue': {
+                    'pending': statuses.count('pending'),
+                    'processing': statuses.count('processing'),
+                    'completed': statuses.count('completed'),
+                    'failed': statuses.count('failed'),
+                    'total': len(statuses),
+                },
+                'batches': {
+                    'queued': batch_statuses.count('queued'),
+                    'processing': batch_statuses.count('processing'),
+                    'completed': batch_statuses.count('completed'),
+                    'total': len(batch_statuses),
+                },
+            }
+
+
+def make_handler(processor: MockFrameProcessor, submit_latency: float, stats_latency: float, jitter: float):
+    def sleep_for(latency: float) -> None:
+        if latency > 0:
+            time.sleep(max(0.0, random.gauss(latency, latency * jitter)))
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send_json(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if self.path != '/api/analyze-frame':
+                self._send_json(404, {'error': 'Not found'})
+                return
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                body = json.loads(self.rfile.read(length) or b'{}')
+            except json.JSONDecodeError:
+                self._send_json(400, {'error': 'Invalid JSON'})
+                return
+
+            camera_id = body.get('cameraId')
+            frame_data = body.get('frameData')
+            if not camera_id or not frame_data:
+                self._send_json(400, {'error': 'Missing cameraId or frameData'})
+                return
+
+            sleep_for(submit_latency)
+            self._send_json(200, processor.submit(camera_id, frame_data, body.get('priority') or 1,
+                                                       body.get('roi')))
+
+        def do_GET(self):
+            if self.path == '/api/cache-stats':
+                sleep_for(stats_latency)
+                self._send_json(200, processor.stats())
+            elif self.path == '/api/health':
+                self._send_json(200, {'status': 'ok', 'mock': True})
+            else:
+                self._send_json(404, {'error': 'Not found'})
+
+        def log_message(self, format, *args):
+            pass  # Keep the console readable under load
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the frame analysis API"
+    )
+
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8787, help='Port to listen on (default: 8787)')
+    parser.add_argument('--batch-size', type=int, default=5,
+                       help='Pending frames per camera that trigger a batch (default: 5)')
+    parser.add_argument('--similarity-threshold', type=float, default=0.95,
+                       help='Skip frames more similar than this to a recent frame (default: 0.95)')
+    parser.add_argument('--submit-latency-ms', type=float, default=80.0,
+                       help='Mean /api/analyze-frame latency (default: 80)')
+    parser.add_argument('--stats-latency-ms', type=float, default=150.0,
+                       help='Mean /api/cache-stats latency (default: 150)')
+    parser.add_argument('--analysis-latency-ms', type=float, default=2000.0,
+                       help='Mean vision model time per frame; the request that fills a batch waits '
+                            'for the whole batch (default: 2000)')
+    parser.add_argument('--jitter', type=float, default=0.2,
+                       help='Latency standard deviation as a fraction of the mean (default: 0.2)')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                       help='Fraction of frame analyses that fail (default: 0)')
+
+    args = parser.parse_args()
+
+    processor = MockFrameProcessor(
+        batch_size=args.batch_size,
+        similarity_threshold=args.similarity_threshold,
+        analysis_latency=args.analysis_latency_ms / 1000.0,
+        failure_rate=args.failure_rate
+    )
+    handler = make_handler(processor, args.submit_latency_ms / 1000.0,
+                           args.stats_latency_ms / 1000.0, args.jitter)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+
+    print(f"🧪 Mock frame API listening on http://{args.host}:{args.port}")
+    print(f"   Batch size: {args.batch_size}, similarity threshold: {args.similarity_threshold}")
+    print(f"   Latency: submit {args.submit_latency_ms:.0f} ms, analysis {args.analysis_latency_ms:.0f} ms")
+    print("   Press Ctrl+C to stop\n")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping mock server...")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -17,11 +17,20 @@ Usage:
 """
 
 import base64
-import requests
 import argparse
 import sys
 from datetime import datetime
 
+# requests is imported on first use so `--help` or a bad argument returns instantly
+requests = None
+
+
+def _import_dependencies():
+    """Import requests"""
+    global requests
+    if requests is None:
+        import requests
+
 def create_test_image():
     """Create a simple test image using PIL"""
     try:
@@ -68,6 +77,7 @@ def create_test_image():
 
 def send_frame(image_path, camera_id, api_url, priority=5):
     """Send a single frame to the API"""
+    _import_dependencies()
     
     # Read and encode image
     try:
@@ -119,6 +129,7 @@ def send_frame(image_path, camera_id, api_url, priority=5):
 
 def check_cache_stats(api_url):
     """Get cache statistics"""
+    _import_dependencies()
     print("\n📊 Fetching cache statistics...")
     
     try:
@@ -0,0 +1,68 @@
+"""
+Regression test: --phash-radius must work starting from an empty index
+
+Run from the repository root:
+    python -m pytest scripts/tests
+"""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("requests")
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from frame_index import FrameHashIndex, PersistentFrameHashIndex  # noqa: E402
+
+
+def _load_extract_frames():
+    spec = importlib.util.spec_from_file_location(
+        "extract_frames", os.path.join(SCRIPTS_DIR, "extract-frames.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _QueuedResponse:
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'cached': False, 'skipped': False, 'queued': True, 'queueId': 'q1', 'message': 'Frame queued'}
+
+
+def test_send_add_lookup_from_empty_index(tmp_path, monkeypatch):
+    # An index with no entries is falsy, so callers must check `is not None`
+    assert len(FrameHashIndex(4)) == 0
+
+    extract_frames = _load_extract_frames()
+    hash_index = PersistentFrameHashIndex(str(tmp_path), 'cam-1', radius=4)
+    extractor = extract_frames.FrameExtractor('http://localhost', 'cam-1', hash_index=hash_index)
+
+    posts = []
+    monkeypatch.setattr(extract_frames.requests, 'post',
+                        lambda url, json, timeout: posts.append(json) or _QueuedResponse())
+
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    frame[30:90, 40:120] = 255
+
+    # First sighting is sent and indexed, the repeat is caught locally
+    extractor._send_frame(frame, 0, 2)
+    extractor._send_frame(frame.copy(), 1, 2)
+    hash_index.close()
+
+    assert len(posts) == 1
+    assert extractor.frames_sent == 1
+    assert extractor.frames_duplicate == 1
+
+    # The index persisted, so a fresh run skips the frame too
+    reloaded = PersistentFrameHashIndex(str(tmp_path), 'cam-1', radius=4)
+    assert len(reloaded) == 1
+    assert reloaded.lookup(extract_frames.phash(frame)) is not None
+    reloaded.close()
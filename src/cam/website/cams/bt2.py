@@ -1,5 +1,3 @@
-from voxel_sdk.device_controller import DeviceController
-from voxel_sdk.ble import BleVoxelTransport  # or VoxelTransport
 import time
 import os
 from dotenv import load_dotenv
@@ -9,6 +7,9 @@ Wifi_ssid = os.getenv('Wifi_ssid')
 Wifi_password = os.getenv('Wifi_password')
 Web_host_ip = os.getenv('Web_host_ip')
 def initialize_cam():
+    # The SDK pulls in the BLE stack, so it is only imported when we actually connect
+    from voxel_sdk.device_controller import DeviceController
+    from voxel_sdk.ble import BleVoxelTransport  # or VoxelTransport
     transport = BleVoxelTransport(device_name="voxel")
     try:
         asyncio.run(transport.connect(""))
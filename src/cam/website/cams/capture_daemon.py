@@ -0,0 +1,54 @@
+"""Capture daemon: owns the device socket and publishes frames to the shared-memory bus.
+
+Run it once per box, then start the web app (or any analyzer) with
+``Frame_source=bus`` so it reads frames from the bus instead of the socket::
+
+    python -m cams.capture_daemon
+    Frame_source=bus gunicorn -w 4 --threads 8 main:app
+"""
+import os
+import time
+
+from cams.stream_capture import start_stream_capture, get_frame, close_stream
+from cams.bt2 import initialize_cam, close_cam
+from cams.frame_bus import FrameBusWriter
+from cams.recorder import get_recorder
+
+Camera_name = os.getenv('Camera_name', 'voxel')
+
+
+def run() -> None:
+    ctrl = initialize_cam()
+    con = start_stream_capture(ctrl)
+    bus = FrameBusWriter()
+    recorder = get_recorder(Camera_name)
+    print(f"Publishing frames to shared memory bus {bus.name}")
+
+    frames = 0
+    started = time.time()
+    try:
+        while True:
+            buffer = get_frame(ctrl, con)
+            if buffer is None:
+                continue
+            frame = buffer.tobytes()
+            timestamp = time.time()
+            bus.publish(frame, timestamp)
+            recorder.append(frame, timestamp)
+
+            frames += 1
+            if frames % 300 == 0:
+                print(f"Captured {frames} frames ({frames / (time.time() - started):.1f} fps)")
+    except KeyboardInterrupt:
+        print("Stopping capture daemon")
+    finally:
+        bus.close()
+        try:
+            close_stream(ctrl[0])
+            close_cam(ctrl[1])
+        except Exception as e:
+            print(e)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,196 @@
+from collections import Counter, deque
+from functools import wraps
+from typing import Optional
+import os
+import sys
+import threading
+import time
+import traceback
+
+Trace_buffer_size = int(os.getenv('Trace_buffer_size', '10000'))
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler for every thread in the process.
+
+    A background thread snapshots ``sys._current_frames()`` at a fixed rate and
+    aggregates the stacks into collapsed-stack format (``a;b;c count`` per
+    line), which flamegraph.pl, speedscope and inferno read directly.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._counts: Counter = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float = 30.0, hz: float = 100.0) -> None:
+        """Start sampling for at most ``seconds``; raises if already running."""
+        with self._lock:
+            if self.running:
+                raise RuntimeError("Profiler is already running")
+            self._counts = Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(time.time() + seconds, 1.0 / hz),
+                name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> str:
+        """Stop sampling (if still running) and return the collapsed stacks."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+        return self.collapsed()
+
+    def wait(self) -> str:
+        """Block until the current run ends on its own and return the collapsed stacks."""
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self._counts.most_common())
+
+    def _run(self, deadline: float, interval: float) -> None:
+        own = threading.get_ident()
+        while not self._stop.is_set() and time.time() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            stacks = []
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                parts.append(names.get(ident, f"thread-{ident}"))
+                stacks.append(";".join(reversed(parts)))
+            del frames
+            with self._lock:
+                self._counts.update(stacks)
+                self.samples += 1
+            self._stop.wait(interval)
+
+
+def dump_stacks() -> str:
+    """Current stack of every thread, like a Java thread dump."""
+    names = {t.ident: (t.name, t.daemon) for t in threading.enumerate()}
+    out = []
+    for ident, frame in sys._current_frames().items():
+        name, daemon = names.get(ident, (f"thread-{ident}", False))
+        out.append(f'Thread "{name}" ident={ident}{" daemon" if daemon else ""}\n')
+        out.extend(traceback.format_stack(frame))
+        out.append("\n")
+    return "".join(out)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        tracer.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class Tracer:
+    """Lightweight span recorder that can be toggled at runtime.
+
+    While disabled, :meth:`span` returns a shared no-op context manager and
+    :func:`traced` functions cost a single attribute check, so the hooks can
+    stay in the hot path permanently.
+    """
+
+    def __init__(self, size: int = Trace_buffer_size) -> None:
+        self.enabled = False
+        self._spans = deque(maxlen=size)
+
+    def enable(self, enabled: bool = True) -> None:
+        if enabled and not self.enabled:
+            self._spans.clear()
+        self.enabled = enabled
+
+    def span(self, name: str):
+        return _Span(name) if self.enabled else _NOOP_SPAN
+
+    def record(self, name: str, start: float, duration: float) -> None:
+        # deque.append is atomic, so no lock on the hot path
+        self._spans.append((name, threading.current_thread().name, start, duration))
+
+    def recent(self, limit: int = 200):
+        spans = list(self._spans)[-limit:]
+        return [
+            {"name": name, "thread": thread, "start": start, "ms": duration * 1000.0}
+            for name, thread, start, duration in spans
+        ]
+
+    def stats(self):
+        """Count, mean, p50, p99 and max duration (ms) per span name."""
+        by_name = {}
+        for name, _, _, duration in list(self._spans):
+            by_name.setdefault(name, []).append(duration * 1000.0)
+        result = {}
+        for name, durations in by_name.items():
+            durations.sort()
+            n = len(durations)
+            result[name] = {
+                "count": n,
+                "mean_ms": sum(durations) / n,
+                "p50_ms": durations[n // 2],
+                "p99_ms": durations[min(n - 1, int(n * 0.99))],
+                "max_ms": durations[-1],
+            }
+        return result
+
+
+tracer = Tracer()
+profiler = SamplingProfiler()
+
+
+def traced(name: str):
+    """Decorator recording a span around each call while tracing is enabled."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                tracer.record(name, start, time.perf_counter() - start)
+        return wrapper
+    return decorator
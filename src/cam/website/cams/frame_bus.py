@@ -0,0 +1,194 @@
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+import os
+import struct
+import time
+
+Frame_bus_name = os.getenv('Frame_bus_name', f"{os.getenv('Camera_name', 'voxel')}_frames")
+Frame_bus_slots = int(os.getenv('Frame_bus_slots', '8'))
+Frame_bus_slot_mb = int(os.getenv('Frame_bus_slot_mb', '2'))
+
+# Bus header: magic, slot count, slot payload capacity, writer generation (0 once closed),
+# newest published frame number
+BUS_HEADER = struct.Struct("<4sIIQQ")
+# Slot header: seqlock counter (odd while being written), frame number, timestamp, payload length
+SLOT_HEADER = struct.Struct("<QQdI")
+BUS_MAGIC = b"VXB2"
+
+
+def bus_name_for(camera: str) -> str:
+    """Shared memory name a capture daemon for ``camera`` publishes to by default."""
+    return f"{camera}_frames"
+
+
+def _slot_offset(index: int, slot_size: int) -> int:
+    return BUS_HEADER.size + index * (SLOT_HEADER.size + slot_size)
+
+
+class FrameBusWriter:
+    """Single-producer ring of JPEG frames in shared memory.
+
+    The capture daemon is the only process that owns the device socket; it
+    publishes every frame here and any number of local processes attach with
+    :class:`FrameBusReader`. Each slot is guarded by a seqlock so readers never
+    block the writer and detect torn reads instead. Every writer stamps the
+    header with a new generation so readers can tell when a restarted daemon
+    has replaced the block.
+
+    :param name: Shared memory block name.
+    :param slot_count: Number of frames kept in the ring.
+    :param slot_size: Largest JPEG payload a slot can hold, in bytes.
+    """
+
+    def __init__(
+        self,
+        name: str = Frame_bus_name,
+        slot_count: int = Frame_bus_slots,
+        slot_size: int = Frame_bus_slot_mb * 1024 * 1024,
+    ) -> None:
+        size = _slot_offset(slot_count, slot_size)
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a daemon that didn't shut down cleanly
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self.name = name
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.generation = time.time_ns()
+        self._frame_number = 0
+        self._buf = self._shm.buf
+        for i in range(slot_count):
+            SLOT_HEADER.pack_into(self._buf, _slot_offset(i, slot_size), 0, 0, 0.0, 0)
+        BUS_HEADER.pack_into(self._buf, 0, BUS_MAGIC, slot_count, slot_size, self.generation, 0)
+
+    def publish(self, payload: bytes, timestamp: Optional[float] = None) -> int:
+        """Write one frame into the next slot and return its frame number (0 if dropped)."""
+        length = len(payload)
+        if not length:
+            return 0
+        if length > self.slot_size:
+            print(f"Frame of {length} bytes exceeds bus slot size, dropping")
+            return 0
+        if timestamp is None:
+            timestamp = time.time()
+
+        self._frame_number += 1
+        offset = _slot_offset(self._frame_number % self.slot_count, self.slot_size)
+        seq = SLOT_HEADER.unpack_from(self._buf, offset)[0]
+
+        # Odd sequence marks the slot as being written
+        struct.pack_into("<Q", self._buf, offset, seq + 1)
+        start = offset + SLOT_HEADER.size
+        self._buf[start:start + length] = payload
+        SLOT_HEADER.pack_into(self._buf, offset, seq + 1, self._frame_number, timestamp, length)
+        struct.pack_into("<Q", self._buf, offset, seq + 2)
+
+        BUS_HEADER.pack_into(self._buf, 0, BUS_MAGIC, self.slot_count, self.slot_size,
+                             self.generation, self._frame_number)
+        return self._frame_number
+
+    def close(self) -> None:
+        # Tell attached readers the block is gone before unlinking it
+        BUS_HEADER.pack_into(self._buf, 0, BUS_MAGIC, self.slot_count, self.slot_size, 0, self._frame_number)
+        self._buf = None
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _attach(name: str) -> Tuple[shared_memory.SharedMemory, int, int, int]:
+    """Map an existing bus block and return it with its slot count, slot size and generation."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        # Readers must not unlink the block when they exit; only the writer owns it
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+    magic, slot_count, slot_size, generation, _ = BUS_HEADER.unpack_from(shm.buf, 0)
+    if magic != BUS_MAGIC:
+        shm.close()
+        raise RuntimeError(f"Shared memory {name} is not a frame bus")
+    return shm, slot_count, slot_size, generation
+
+
+class FrameBusReader:
+    """Attach to a running capture daemon's frame ring.
+
+    A restarted daemon unlinks the old block and creates a new one, so a
+    reader stays mapped to a dead ring until :meth:`reattach` is called.
+
+    :param name: Shared memory block name used by the writer.
+    """
+
+    def __init__(self, name: str = Frame_bus_name) -> None:
+        self.name = name
+        self._shm, self.slot_count, self.slot_size, self.generation = _attach(name)
+        self._buf = self._shm.buf
+
+    @property
+    def latest_frame_number(self) -> int:
+        return BUS_HEADER.unpack_from(self._buf, 0)[4]
+
+    @property
+    def writer_closed(self) -> bool:
+        """True once the writer of the mapped block has shut down."""
+        return BUS_HEADER.unpack_from(self._buf, 0)[3] != self.generation
+
+    def reattach(self) -> bool:
+        """Map the block currently published under ``name`` if a new writer created it.
+
+        Returns True if the reader moved to a new block; frame numbers restart
+        there. Raises FileNotFoundError when no daemon is publishing.
+        """
+        shm, slot_count, slot_size, generation = _attach(self.name)
+        if generation == self.generation or generation == 0:
+            shm.close()
+            return False
+        self._buf = None
+        self._shm.close()
+        self._shm, self.slot_count, self.slot_size, self.generation = shm, slot_count, slot_size, generation
+        self._buf = shm.buf
+        return True
+
+    def read(self, frame_number: int, retries: int = 3) -> Optional[Tuple[int, float, bytes]]:
+        """Copy out one frame, or None if it has already been overwritten."""
+        offset = _slot_offset(frame_number % self.slot_count, self.slot_size)
+        start = offset + SLOT_HEADER.size
+        for _ in range(retries):
+            seq, number, timestamp, length = SLOT_HEADER.unpack_from(self._buf, offset)
+            if seq & 1:
+                time.sleep(0)
+                continue
+            if number != frame_number or number == 0:
+                # Overwritten, or an empty slot of a bus nothing was published to yet
+                return None
+            payload = bytes(self._buf[start:start + length])
+            if struct.unpack_from("<Q", self._buf, offset)[0] == seq:
+                return number, timestamp, payload
+        return None
+
+    def wait_next(self, after: int, timeout: float = 5.0, poll: float = 0.002) -> Optional[Tuple[int, float, bytes]]:
+        """Block until a frame newer than ``after`` is published and return the newest one.
+
+        Slow consumers skip straight to the newest frame instead of falling behind.
+        Returns None after ``timeout`` or as soon as the writer shuts down.
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline and not self.writer_closed:
+            latest = self.latest_frame_number
+            if latest > after:
+                frame = self.read(latest)
+                if frame is not None:
+                    return frame
+            time.sleep(poll)
+        return None
+
+    def close(self) -> None:
+        self._buf = None
+        self._shm.close()
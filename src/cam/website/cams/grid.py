@@ -0,0 +1,180 @@
+from typing import Callable, Dict, Optional, Tuple
+import threading
+import time
+
+# Optional dependencies for compositing, imported on first use because they
+# dominate startup time
+cv2 = None
+np = None
+
+
+def _import_optional_dependencies() -> None:
+    global cv2, np
+    if np is not None:
+        return
+    try:
+        import cv2
+        import numpy as np
+    except ImportError:  # pragma: no cover - optional dependency
+        cv2 = None
+        np = None
+
+
+# A frame source returns (frame number, JPEG bytes) for the newest frame, or None when offline
+FrameSource = Callable[[], Optional[Tuple[int, bytes]]]
+
+
+class GridCompositor:
+    """Composite the newest frame of every camera into one MJPEG canvas.
+
+    One background thread builds and encodes the canvas once per tick and
+    every viewer of the same layout receives that same JPEG, so the cost is
+    independent of the number of viewers. Thumbnails are only re-decoded when
+    a camera publishes a new frame. The thread stops when the last viewer
+    disconnects.
+
+    :param sources: Camera name -> frame source.
+    :param columns: Tiles per row (defaults to a near-square layout).
+    :param tile_width: Width of each tile in pixels; height keeps 16:9.
+    :param fps: Grid ticks per second.
+    :param quality: JPEG quality of the composited canvas.
+    """
+
+    def __init__(
+        self,
+        sources: Dict[str, FrameSource],
+        columns: Optional[int] = None,
+        tile_width: int = 320,
+        fps: float = 5.0,
+        quality: int = 75,
+    ) -> None:
+        _import_optional_dependencies()
+        if cv2 is None or np is None:
+            raise RuntimeError("OpenCV (cv2) and numpy are required for the grid stream. Install them with `pip install opencv-python numpy`.")
+
+        self.sources = sources
+        self.columns = columns or max(1, int(np.ceil(np.sqrt(len(sources)))))
+        self.columns = min(max(self.columns, 1), max(len(sources), 1))
+        self.rows = max(1, int(np.ceil(len(sources) / self.columns)))
+        self.tile_width = tile_width
+        self.tile_height = tile_width * 9 // 16
+        self.interval = 1.0 / fps
+        self.quality = quality
+
+        # name -> (frame number, thumbnail, IMREAD_REDUCED_* flag that fits the tile)
+        self._thumbnails: Dict[str, Tuple[int, "np.ndarray", int]] = {}
+        self._jpeg: Optional[bytes] = None
+        self._tick = 0
+        self._viewers = 0
+        self._thread: Optional[threading.Thread] = None
+        self._cond = threading.Condition()
+
+    def _thumbnail(self, name: str, source: FrameSource):
+        latest = source()
+        if latest is None:
+            return None
+        frame_number, payload = latest
+
+        cached = self._thumbnails.get(name)
+        if cached is not None and cached[0] == frame_number:
+            return cached[1]
+
+        # Let libjpeg skip work by decoding straight to 1/2, 1/4 or 1/8 scale when it's big enough
+        flag = cached[2] if cached is not None else cv2.IMREAD_COLOR
+        image = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), flag)
+        if image is None:
+            return cached[1] if cached is not None else None
+        if cached is None:
+            flag = self._reduced_flag(image.shape[1])
+
+        thumbnail = cv2.resize(image, (self.tile_width, self.tile_height), interpolation=cv2.INTER_AREA)
+        self._thumbnails[name] = (frame_number, thumbnail, flag)
+        return thumbnail
+
+    def _reduced_flag(self, width: int) -> int:
+        for factor, flag in ((8, cv2.IMREAD_REDUCED_COLOR_8),
+                             (4, cv2.IMREAD_REDUCED_COLOR_4),
+                             (2, cv2.IMREAD_REDUCED_COLOR_2)):
+            if width // factor >= self.tile_width:
+                return flag
+        return cv2.IMREAD_COLOR
+
+    def compose(self) -> bytes:
+        """Build and encode one grid canvas."""
+        canvas = np.zeros((self.rows * self.tile_height, self.columns * self.tile_width, 3), dtype=np.uint8)
+        for i, (name, source) in enumerate(self.sources.items()):
+            y = (i // self.columns) * self.tile_height
+            x = (i % self.columns) * self.tile_width
+            try:
+                thumbnail = self._thumbnail(name, source)
+            except Exception as e:
+                print(f"Grid source {name} failed: {e}")
+                thumbnail = None
+
+            label = name
+            if thumbnail is None:
+                label = f"{name} (offline)"
+            else:
+                canvas[y:y + self.tile_height, x:x + self.tile_width] = thumbnail
+            cv2.putText(canvas, label, (x + 8, y + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_AA)
+
+        _, buffer = cv2.imencode('.jpg', canvas, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return buffer.tobytes()
+
+    @property
+    def idle(self) -> bool:
+        """True when no viewer is attached and the compositor thread has stopped."""
+        with self._cond:
+            return self._viewers == 0 and self._thread is None
+
+    def _run(self) -> None:
+        try:
+            while True:
+                start_time = time.time()
+                try:
+                    jpeg = self.compose()
+                except Exception as e:
+                    # Keep serving the last canvas rather than killing the stream for every viewer
+                    print(f"Grid compose failed: {e}")
+                    jpeg = None
+                with self._cond:
+                    if jpeg is not None:
+                        self._jpeg = jpeg
+                        self._tick += 1
+                        self._cond.notify_all()
+                    if self._viewers == 0:
+                        self._thread = None
+                        return
+                time.sleep(max(0.0, self.interval - (time.time() - start_time)))
+        finally:
+            with self._cond:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def _ensure_running(self) -> None:
+        # Caller holds self._cond
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stream(self):
+        """MJPEG generator for one viewer."""
+        with self._cond:
+            self._viewers += 1
+            self._ensure_running()
+            seen = 0
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._tick != seen, timeout=5.0)
+                    if self._tick == seen:
+                        # Restart the compositor if its thread died unexpectedly
+                        self._ensure_running()
+                        continue
+                    seen = self._tick
+                    jpeg = self._jpeg
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+        finally:
+            with self._cond:
+                self._viewers -= 1
@@ -0,0 +1,339 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterator, List, Optional, Tuple
+import mmap
+import os
+import struct
+import threading
+import time
+
+Recording_dir = os.getenv('Recording_dir', 'recordings')
+Recording_segment_mb = int(os.getenv('Recording_segment_mb', '64'))
+Recording_segments = int(os.getenv('Recording_segments', '16'))
+
+# Records are stored exactly as they arrive on the device socket: b"VXL0" + big-endian length + JPEG
+RECORD_HEADER = struct.Struct(">4sI")
+# Per-segment index file: (generation, entry count) followed by (timestamp, offset, length) entries
+INDEX_HEADER = struct.Struct("<QI")
+INDEX_ENTRY = struct.Struct("<dII")
+# Smallest frame we expect; sizes the index so it can't fill before the data file does
+MIN_FRAME_BYTES = 2048
+
+
+def _open_preallocated(path: str, size: int):
+    """Open a file for read/write, creating or resizing it to exactly ``size`` bytes."""
+    mode = "r+b" if os.path.exists(path) else "w+b"
+    f = open(path, mode)
+    if os.fstat(f.fileno()).st_size != size:
+        f.truncate(size)
+    return f
+
+
+class _Segment:
+    """One pre-allocated, memory-mapped data file plus its timestamp index.
+
+    A read-only segment maps files owned by a writer in another process and
+    never modifies them; ``refresh()`` picks up the writer's changes from the
+    index header.
+    """
+
+    def __init__(self, data_path: str, index_path: str, size: int, read_only: bool = False):
+        self.size = size
+        self.max_entries = size // MIN_FRAME_BYTES
+        self.read_only = read_only
+        self._data_path = data_path
+        self._index_path = index_path
+
+        self.timestamps = array("d")
+        self.offsets = array("I")
+        self.lengths = array("I")
+        self.write_offset = 0
+        self.generation = 0
+        self.data = None
+        self.index = None
+
+        if read_only:
+            self.refresh()
+            return
+
+        index_size = INDEX_HEADER.size + INDEX_ENTRY.size * self.max_entries
+        self._data_file = _open_preallocated(data_path, size)
+        self.data = mmap.mmap(self._data_file.fileno(), size)
+        self._index_file = _open_preallocated(index_path, index_size)
+        self.index = mmap.mmap(self._index_file.fileno(), index_size)
+
+        self.generation, count = INDEX_HEADER.unpack_from(self.index, 0)
+        self._load_entries(count)
+
+    def _load_entries(self, count: int) -> None:
+        for i in range(len(self.timestamps), min(count, self.max_entries)):
+            timestamp, offset, length = INDEX_ENTRY.unpack_from(
+                self.index, INDEX_HEADER.size + i * INDEX_ENTRY.size)
+            end = offset + RECORD_HEADER.size + length
+            if end > self.size:
+                break
+            self.timestamps.append(timestamp)
+            self.offsets.append(offset)
+            self.lengths.append(length)
+            self.write_offset = end
+
+    def _map_read_only(self) -> bool:
+        try:
+            data_file = open(self._data_path, "rb")
+        except FileNotFoundError:
+            return False
+        try:
+            index_file = open(self._index_path, "rb")
+        except FileNotFoundError:
+            data_file.close()
+            return False
+
+        # Size from the files themselves, the writer may be configured differently
+        size = os.fstat(data_file.fileno()).st_size
+        index_size = os.fstat(index_file.fileno()).st_size
+        if size == 0 or index_size < INDEX_HEADER.size:
+            data_file.close()
+            index_file.close()
+            return False
+
+        self._data_file, self._index_file = data_file, index_file
+        self.data = mmap.mmap(data_file.fileno(), size, access=mmap.ACCESS_READ)
+        self.index = mmap.mmap(index_file.fileno(), index_size, access=mmap.ACCESS_READ)
+        self.size = size
+        self.max_entries = (index_size - INDEX_HEADER.size) // INDEX_ENTRY.size
+        return True
+
+    def live_generation(self) -> int:
+        """Generation currently in the index header (changes as soon as the segment is reused)."""
+        if self.index is None:
+            return 0
+        return INDEX_HEADER.unpack_from(self.index, 0)[0]
+
+    def refresh(self) -> None:
+        """Re-read the index header and load entries the writer added since the last call."""
+        if not self.read_only:
+            return
+        if self.index is None and not self._map_read_only():
+            return
+        while True:
+            generation, count = INDEX_HEADER.unpack_from(self.index, 0)
+            if generation != self.generation:
+                self.generation = generation
+                self.timestamps = array("d")
+                self.offsets = array("I")
+                self.lengths = array("I")
+                self.write_offset = 0
+            self._load_entries(count)
+            # The writer reused the segment while we were reading its entries
+            if self.live_generation() == generation:
+                return
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def reset(self, generation: int) -> None:
+        # The new generation is published before any byte of the old data is overwritten
+        self.generation = generation
+        self.timestamps = array("d")
+        self.offsets = array("I")
+        self.lengths = array("I")
+        self.write_offset = 0
+        INDEX_HEADER.pack_into(self.index, 0, generation, 0)
+
+    def fits(self, length: int) -> bool:
+        return (self.write_offset + RECORD_HEADER.size + length <= self.size
+                and len(self.timestamps) < self.max_entries)
+
+    def append(self, timestamp: float, payload: bytes) -> None:
+        offset = self.write_offset
+        length = len(payload)
+        RECORD_HEADER.pack_into(self.data, offset, b"VXL0", length)
+        start = offset + RECORD_HEADER.size
+        self.data[start:start + length] = payload
+
+        INDEX_ENTRY.pack_into(
+            self.index, INDEX_HEADER.size + len(self.timestamps) * INDEX_ENTRY.size,
+            timestamp, offset, length)
+        self.timestamps.append(timestamp)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        # Publish the entry count last so a crash never exposes a half-written record
+        INDEX_HEADER.pack_into(self.index, 0, self.generation, len(self.timestamps))
+        self.write_offset = start + length
+
+    def read(self, i: int) -> bytes:
+        start = self.offsets[i] + RECORD_HEADER.size
+        return self.data[start:start + self.lengths[i]]
+
+    def close(self) -> None:
+        if self.index is None:
+            return
+        if not self.read_only:
+            self.data.flush()
+            self.index.flush()
+        self.data.close()
+        self.index.close()
+        self._data_file.close()
+        self._index_file.close()
+
+
+class DvrRecorder:
+    """Rolling on-disk recorder of raw VXL0 JPEG payloads for one camera.
+
+    Frames are appended to a fixed ring of pre-allocated segment files; when
+    the last segment fills, the oldest one is reused. Each segment keeps a
+    compact timestamp -> offset index so a time window can be located with a
+    binary search instead of scanning the recording.
+
+    :param directory: Directory holding this camera's segment files.
+    :param segment_bytes: Size of each pre-allocated segment file.
+    :param segment_count: Number of segments in the ring.
+    :param read_only: Open recordings written by another process (e.g. the
+        capture daemon) for replay only; nothing on disk is created or modified.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = Recording_segment_mb * 1024 * 1024,
+        segment_count: int = Recording_segments,
+        read_only: bool = False,
+    ) -> None:
+        if read_only:
+            # The writer may be configured with more segments than this process
+            existing = [name for name in os.listdir(directory) if name.startswith("seg_") and name.endswith(".idx")]
+            segment_count = max(segment_count, len(existing))
+        else:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._segments: List[_Segment] = [
+            _Segment(
+                os.path.join(directory, f"seg_{i:03d}.vxl"),
+                os.path.join(directory, f"seg_{i:03d}.idx"),
+                segment_bytes,
+                read_only,
+            )
+            for i in range(segment_count)
+        ]
+        if read_only:
+            return
+
+        newest = max(range(segment_count), key=lambda i: self._segments[i].generation)
+        self._active = newest
+        self._next_generation = self._segments[newest].generation + 1
+        if self._segments[newest].generation == 0:
+            self._rotate_to(newest)
+
+    def _rotate_to(self, i: int) -> None:
+        self._active = i
+        self._segments[i].reset(self._next_generation)
+        self._next_generation += 1
+
+    def append(self, payload: bytes, timestamp: Optional[float] = None) -> None:
+        """Record one JPEG payload."""
+        if self.read_only:
+            raise RuntimeError(f"Recorder for {self.directory} is read-only")
+        with self._lock:
+            # Stamp under the lock so concurrent writers append in timestamp order
+            if timestamp is None:
+                timestamp = time.time()
+            segment = self._segments[self._active]
+            if len(segment):
+                # The index is binary searched, so never go backwards (e.g. on a clock step)
+                timestamp = max(timestamp, segment.timestamps[-1])
+            if not segment.fits(len(payload)):
+                self._rotate_to((self._active + 1) % len(self._segments))
+                segment = self._segments[self._active]
+                if not segment.fits(len(payload)):
+                    return  # Frame larger than a whole segment
+            segment.append(timestamp, payload)
+
+    def span(self) -> Optional[Tuple[float, float]]:
+        """Oldest and newest recorded timestamps, or None if nothing is recorded."""
+        with self._lock:
+            self._refresh()
+            filled = [s for s in self._segments if len(s)]
+            if not filled:
+                return None
+            return (min(s.timestamps[0] for s in filled), max(s.timestamps[-1] for s in filled))
+
+    def frames(self, start: float, end: float) -> Iterator[Tuple[float, bytes]]:
+        """Yield (timestamp, payload) for every frame recorded in [start, end], oldest first.
+
+        Segments that get overwritten by the writer while a replay is in
+        progress are skipped rather than returning torn frames.
+        """
+        with self._lock:
+            self._refresh()
+            ordered = sorted(
+                ((s.generation, s) for s in self._segments if len(s)),
+                key=lambda item: item[0],
+            )
+
+        for generation, segment in ordered:
+            with self._lock:
+                if segment.generation != generation or not len(segment):
+                    continue
+                if segment.timestamps[-1] < start or segment.timestamps[0] > end:
+                    continue
+                i = bisect_left(segment.timestamps, start)
+                stop = bisect_right(segment.timestamps, end)
+
+            while i < stop:
+                with self._lock:
+                    if segment.live_generation() != generation:
+                        break
+                    # Segment may have grown since the window was located
+                    if i >= len(segment):
+                        break
+                    timestamp = segment.timestamps[i]
+                    payload = segment.read(i)
+                    # A writer in another process may have reused the segment mid-copy
+                    if segment.live_generation() != generation:
+                        break
+                yield timestamp, payload
+                i += 1
+
+    def _refresh(self) -> None:
+        for segment in self._segments:
+            segment.refresh()
+
+    def close(self) -> None:
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+
+
+_recorders = {}
+_readers = {}
+_recorders_lock = threading.Lock()
+
+
+def get_recorder(camera: str, create: bool = True) -> Optional[DvrRecorder]:
+    """Return the recorder for ``camera``, opening its segment files on first use.
+
+    With ``create=False`` only cameras that already have recordings on disk
+    are opened, and unless this process is the one recording them the
+    recorder is read-only, so replay in a web worker never touches the
+    segments the capture daemon owns.
+    """
+    if not camera or not all(c.isalnum() or c in "-_" for c in camera):
+        return None
+    with _recorders_lock:
+        recorder = _recorders.get(camera)
+        if recorder is not None:
+            return recorder
+        directory = os.path.join(Recording_dir, camera)
+        if create:
+            recorder = DvrRecorder(directory)
+            _recorders[camera] = recorder
+            return recorder
+        if not os.path.isdir(directory):
+            return None
+        reader = _readers.get(camera)
+        if reader is None:
+            reader = DvrRecorder(directory, read_only=True)
+            _readers[camera] = reader
+        return reader
@@ -5,15 +5,31 @@ import socket
 import struct
 import os
 from dotenv import load_dotenv
+from cams.diagnostics import traced
 
 Web_host_ip = os.getenv('Web_host_ip')
 
-try:  # Optional dependencies for visualization
-    import cv2
-    import numpy as np
-except ImportError:  # pragma: no cover - optional dependency
-    cv2 = None
-    np = None
+# Optional dependencies for visualization, imported on first use because they
+# dominate startup time
+cv2 = None
+np = None
+
+def _import_optional_dependencies():
+    global cv2, np
+    if np is not None:
+        return
+    try:
+        import cv2
+        import numpy as np
+    except ImportError:  # pragma: no cover - optional dependency
+        cv2 = None
+        np = None
+
+def warm_up():
+    """Import OpenCV/numpy and initialize the JPEG codec ahead of the first frame."""
+    _import_optional_dependencies()
+    if cv2 is not None:
+        cv2.imencode('.jpg', np.zeros((8, 8, 3), dtype=np.uint8))
 
 def start_stream_capture(
     _self,
@@ -40,6 +56,7 @@ def start_stream_capture(
     if not self.is_connected():
         raise ConnectionError("Connect to the device first")
 
+    _import_optional_dependencies()
     if cv2 is None or np is None:
         raise RuntimeError("OpenCV (cv2) and numpy are required for stream visualization. Install them with `pip install opencv-python numpy`." )
 
@@ -75,9 +92,14 @@ def start_stream_capture(
 
     return conn
 
+@traced("recv_exact")
+def _recv_exact(self, conn, n):
+    return self._recv_exact(conn, n)
+
+@traced("get_frame")
 def get_frame(_self, conn):
     self = _self[0]
-    header = self._recv_exact(conn, 8)
+    header = _recv_exact(self, conn, 8)
     if not header:
         print("Stream closed by device")
         return
@@ -95,7 +117,7 @@ def get_frame(_self, conn):
         print(f"Invalid frame length: {frame_len}")
         return
 
-    payload = self._recv_exact(conn, frame_len)
+    payload = _recv_exact(self, conn, frame_len)
     if not payload:
         print("Failed to read frame payload")
         return
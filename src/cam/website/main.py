@@ -1,48 +1,219 @@
 # Import necessary modules
 from flask import Flask, render_template, Response, request, jsonify, redirect, url_for
-from aiortc import RTCPeerConnection, RTCSessionDescription
-import cv2
+import hmac
 import json
 import uuid
 import asyncio
 import logging
+import threading
 import time
-from cams.stream_capture import start_stream_capture, get_frame, close_stream
+import os
+from cams.stream_capture import start_stream_capture, get_frame, close_stream, warm_up
 from cams.bt2 import initialize_cam, close_cam
+from cams.recorder import get_recorder
+from cams.frame_bus import FrameBusReader, bus_name_for
+from cams.grid import GridCompositor
+from cams.diagnostics import profiler, tracer, dump_stacks
+
+Camera_name = os.getenv('Camera_name', 'voxel')
+# 'direct' owns the device socket in this process; 'bus' reads frames published by cams.capture_daemon
+Frame_source = os.getenv('Frame_source', 'direct')
+# Comma-separated camera names shown on /grid; in bus mode each needs its own capture daemon
+Grid_cameras = [c for c in os.getenv('Grid_cameras', Camera_name).split(',') if c]
+# /admin routes require this token (?token= or X-Admin-Token header) and are disabled when it is unset
+Admin_token = os.getenv('Admin_token')
 
 # Create a Flask app instance
 app = Flask(__name__, static_url_path='/static')
 con = None
+# Device connection state reported by /healthz: starting, ready or error
+camera_state = {"status": "starting", "error": None}
+capture_thread = None
+capture_lock = threading.Lock()
 # Set to keep track of RTCPeerConnection instances
 pcs = set()
-@app.before_request
-def first_req():
+# Newest frame seen per camera in direct mode: name -> (frame number, JPEG bytes)
+latest_frames = {}
+# Notified whenever the capture loop updates latest_frames
+frame_cond = threading.Condition()
+# Frames read by the capture loop since startup; numbers latest_frames entries
+captured_frames = 0
+# One compositor per layout so every viewer of a layout shares one encode per tick
+grids = {}
+grids_lock = threading.Lock()
+# One bus reader per camera, shared by every layout
+bus_sources = {}
+# /grid snaps width and fps to these so the number of layouts stays small
+Grid_widths = (160, 240, 320, 480, 640, 960, 1280)
+Grid_fps = (0.5, 1.0, 2.0, 5.0, 10.0, 15.0, 30.0)
+# Connect to the device and warm up the codec without blocking requests, then keep capturing
+def connect_camera():
     global ctrl
     global con
-    if con is None:
+    warm_up()
+    try:
+        ctrl = initialize_cam()
+        con = start_stream_capture(ctrl)
+        camera_state.update(status="ready", error=None)
+    except Exception as e:
+        print("dang")
+        print(e)
+        camera_state.update(status="error", error=str(e))
+        #close_cam(ctrl[1])
+        return
+    capture_loop()
+
+# Read the device continuously so recording and /grid don't depend on a /video_feed viewer
+def capture_loop():
+    global con
+    global captured_frames
+    recorder = get_recorder(Camera_name)
+    try:
+        while True:
+            buffer = get_frame(ctrl, con)
+            if buffer is None:
+                continue
+            frame = buffer.tobytes()
+            recorder.append(frame)
+            with frame_cond:
+                captured_frames += 1
+                latest_frames[Camera_name] = (captured_frames, frame)
+                frame_cond.notify_all()
+    except Exception as e:
+        print(e)
+        camera_state.update(status="error", error=str(e))
+        # Show the camera offline and let the next request reconnect
+        with frame_cond:
+            latest_frames.pop(Camera_name, None)
+            con = None
         try:
-            ctrl = initialize_cam()
-            con = start_stream_capture(ctrl)
+            close_stream(ctrl[0])
+            close_cam(ctrl[1])
         except Exception as e:
-            print("dang")
             print(e)
-            #close_cam(ctrl[1])
+
+def start_capture_in_background():
+    global capture_thread
+    if Frame_source == 'bus' or con is not None:
+        return
+    with capture_lock:
+        # Retry after a failed attempt, but never run two connects at once
+        if capture_thread is None or not capture_thread.is_alive():
+            capture_thread = threading.Thread(target=connect_camera, name="camera-capture", daemon=True)
+            capture_thread.start()
+
+@app.before_request
+def first_req():
+    start_capture_in_background()
+
+# Route for health checks; answers immediately while the camera is still connecting
+@app.route('/healthz')
+def healthz():
+    camera = "bus" if Frame_source == 'bus' else camera_state["status"]
+    return jsonify({"status": "ok", "camera": camera, "error": camera_state["error"]})
 
 
-# Function to generate video frames from the camera
+# Function to generate video frames from the capture loop
 def generate_frames():
+    last = 0
     while True:
         start_time = time.time()
-        global con
-        global ctrl
-        if con is not None:
-            buffer = get_frame(ctrl, con)
-            frame = buffer.tobytes()
-            # Concatenate frame and yield for streaming
+        with frame_cond:
+            frame_cond.wait_for(lambda: latest_frames.get(Camera_name, (0, None))[0] > last, timeout=5.0)
+            latest = latest_frames.get(Camera_name)
+        if latest is None or latest[0] <= last:
+            # Camera is still connecting, or reconnecting after an error
+            start_capture_in_background()
+            continue
+        last, frame = latest
+        # Concatenate frame and yield for streaming; the WSGI server writes it before resuming us
+        with tracer.span("response_write"):
             yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n') 
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+        elapsed_time = time.time() - start_time
+        logging.debug(f"Frame generation time: {elapsed_time} seconds")
+
+# Function to generate video frames from the shared memory frame bus
+def generate_bus_frames(reader):
+    last = max(reader.latest_frame_number - 1, 0)
+    misses = 0
+    try:
+        while True:
+            start_time = time.time()
+            frame = reader.wait_next(last)
+            if frame is None:
+                # A restarted daemon publishes to a new block; end the stream if none shows up
+                misses += 1
+                try:
+                    if reader.reattach():
+                        last, misses = 0, 0
+                        continue
+                except (FileNotFoundError, RuntimeError):
+                    pass
+                if misses >= 3:
+                    return
+                continue
+            last, _, payload = frame
+            misses = 0
+            with tracer.span("response_write"):
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + payload + b'\r\n')
             elapsed_time = time.time() - start_time
             logging.debug(f"Frame generation time: {elapsed_time} seconds")
+    finally:
+        reader.close()
+
+# Frame source for the grid that reads the newest frame of one camera's bus
+def bus_grid_source(camera):
+    state = {"reader": None, "retry_at": 0.0}
+    lock = threading.Lock()
+    def source():
+        # Several layouts' compositor threads share this reader
+        with lock:
+            return read_newest()
+    def read_newest():
+        if state["reader"] is None:
+            if time.time() < state["retry_at"]:
+                return None
+            try:
+                state["reader"] = FrameBusReader(bus_name_for(camera))
+            except (FileNotFoundError, RuntimeError):
+                state["retry_at"] = time.time() + 5.0
+                return None
+        reader = state["reader"]
+        frame = reader.read(reader.latest_frame_number)
+        if frame is not None and not reader.writer_closed and time.time() - frame[1] < 5.0:
+            return frame[0], frame[2]
+        # No fresh frame: show the camera offline and look for a restarted daemon's new block
+        if time.time() >= state["retry_at"]:
+            state["retry_at"] = time.time() + 1.0
+            try:
+                reader.reattach()
+            except (FileNotFoundError, RuntimeError):
+                reader.close()
+                state["reader"] = None
+        return None
+    return source
+
+def snap(value, allowed):
+    return min(allowed, key=lambda a: abs(a - value))
+
+def get_grid(columns, tile_width, fps):
+    key = (columns, snap(tile_width, Grid_widths), snap(fps, Grid_fps))
+    with grids_lock:
+        # Drop layouts nobody is watching so their thumbnails don't pile up
+        for idle in [k for k, g in grids.items() if k != key and g.idle]:
+            del grids[idle]
+        if key not in grids:
+            if Frame_source == 'bus':
+                for camera in Grid_cameras:
+                    if camera not in bus_sources:
+                        bus_sources[camera] = bus_grid_source(camera)
+                sources = {camera: bus_sources[camera] for camera in Grid_cameras}
+            else:
+                sources = {camera: (lambda camera=camera: latest_frames.get(camera)) for camera in Grid_cameras}
+            grids[key] = GridCompositor(sources, columns=columns, tile_width=key[1], fps=key[2])
+        return grids[key]
 
 # Route to render the HTML template
 @app.route('/')
@@ -52,6 +223,7 @@ def index():
 
 # Asynchronous function to handle offer exchange
 async def offer_async():
+    from aiortc import RTCPeerConnection, RTCSessionDescription
     params = await request.json
     offer = RTCSessionDescription(sdp=params["sdp"], type=params["type"])
 
@@ -90,9 +262,121 @@ def offer_route():
 # Route to stream video frames
 @app.route('/video_feed')
 def video_feed():
+    if Frame_source == 'bus':
+        try:
+            reader = FrameBusReader()
+        except FileNotFoundError:
+            return jsonify({"error": "Capture daemon is not running"}), 503
+        return Response(generate_bus_frames(reader), mimetype='multipart/x-mixed-replace; boundary=frame')
     return Response(generate_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
+def parse_replay_time(value, default):
+    """Epoch seconds, or a negative number of seconds relative to now (e.g. -600)."""
+    if value is None:
+        return default
+    t = float(value)
+    return time.time() + t if t <= 0 else t
+
+# Function to replay recorded frames at their original pace
+def generate_replay(recorder, start, end, speed):
+    previous = None
+    sent_at = None
+    for timestamp, frame in recorder.frames(start, end):
+        if previous is not None and speed > 0:
+            delay = (timestamp - previous) / speed - (time.time() - sent_at)
+            if delay > 0:
+                time.sleep(delay)
+        previous = timestamp
+        sent_at = time.time()
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+
+# Route to replay a recorded window, e.g. /replay/voxel?from=-600 for the last 10 minutes
+@app.route('/replay/<camera>')
+def replay(camera):
+    recorder = get_recorder(camera, create=False)
+    if recorder is None:
+        return jsonify({"error": f"No recordings for camera {camera}"}), 404
+    try:
+        start = parse_replay_time(request.args.get('from'), time.time() - 600)
+        end = parse_replay_time(request.args.get('to'), time.time())
+        speed = float(request.args.get('speed', 1.0))
+    except ValueError:
+        return jsonify({"error": "from, to and speed must be numbers"}), 400
+    return Response(generate_replay(recorder, start, end, speed), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+# Route to stream all cameras composited into one grid, e.g. /grid?cols=3&width=320&fps=5
+@app.route('/grid')
+def grid():
+    columns = request.args.get('cols', type=int)
+    if columns is not None:
+        columns = min(max(columns, 1), max(len(Grid_cameras), 1))
+    tile_width = request.args.get('width', 320, type=int)
+    fps = request.args.get('fps', 5.0, type=float)
+    return Response(get_grid(columns, tile_width, fps).stream(), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+# Reject admin requests without the configured token; the app listens on all interfaces,
+# so stack dumps and the profiler stay off entirely unless a token is set
+@app.before_request
+def check_admin_token():
+    if request.path.startswith('/admin/'):
+        if not Admin_token:
+            return jsonify({"error": "Admin routes are disabled; set Admin_token to enable them"}), 403
+        token = request.headers.get('X-Admin-Token') or request.args.get('token')
+        if not token or not hmac.compare_digest(token, Admin_token):
+            return jsonify({"error": "Unauthorized"}), 401
+
+def collapsed_response(text):
+    return Response(text, mimetype='text/plain',
+                    headers={'Content-Disposition': 'attachment; filename=profile.collapsed'})
+
+# Route to profile for N seconds and return flamegraph-ready collapsed stacks
+@app.route('/admin/profile')
+def admin_profile():
+    seconds = min(max(request.args.get('seconds', 10.0, type=float), 0.1), 300.0)
+    hz = min(max(request.args.get('hz', 100.0, type=float), 1.0), 1000.0)
+    try:
+        profiler.start(seconds, hz)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    return collapsed_response(profiler.wait())
+
+# Routes to start a profile in the background and collect it later
+@app.route('/admin/profile/start', methods=['POST'])
+def admin_profile_start():
+    seconds = min(max(request.args.get('seconds', 60.0, type=float), 0.1), 3600.0)
+    hz = min(max(request.args.get('hz', 100.0, type=float), 1.0), 1000.0)
+    try:
+        profiler.start(seconds, hz)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify({"running": True, "seconds": seconds, "hz": hz})
+
+@app.route('/admin/profile/stop', methods=['POST'])
+def admin_profile_stop():
+    return collapsed_response(profiler.stop())
+
+# Route to dump the current stack of every thread
+@app.route('/admin/stacks')
+def admin_stacks():
+    return Response(dump_stacks(), mimetype='text/plain')
+
+# Route to toggle tracing spans around get_frame, _recv_exact and response writes
+@app.route('/admin/tracing', methods=['GET', 'POST'])
+def admin_tracing():
+    if request.method == 'POST':
+        tracer.enable(request.args.get('enabled', '1') not in ('0', 'false', 'off'))
+    return jsonify({"enabled": tracer.enabled})
+
+@app.route('/admin/traces')
+def admin_traces():
+    limit = request.args.get('limit', 200, type=int)
+    return jsonify({"enabled": tracer.enabled, "stats": tracer.stats(), "recent": tracer.recent(limit)})
+
 # Run the Flask app
 if __name__ == "__main__":
+    # With the debug reloader only the child process that serves requests should connect
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_capture_in_background()
     app.run(debug=True, host="0.0.0.0", port=8080)
     